@@ -1,26 +1,59 @@
+import copy
+import gc
+import hashlib
+import importlib.util
+import json
 import os
 import re
 import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from io import BytesIO
+from functools import lru_cache
+from io import BytesIO, StringIO
 from pathlib import Path
 from typing import Dict
 
-import PyPDF2
-import pdfplumber
+import pandas as pd
 import streamlit as st
 
+# PDF readers, the exporter (docx/reportlab) and the NLP processor (spaCy/nltk/sklearn)
+# are imported where they are first used, so e.g. pasting text never loads them
+HAVE_PDFIUM = importlib.util.find_spec("pypdfium2") is not None
+# pypdf is the maintained successor of PyPDF2 (same PdfReader API); either works
+HAVE_PYPDF = importlib.util.find_spec("pypdf") is not None
+
+try:
+    import ahocorasick
+    HAVE_AHOCORASICK = True
+except Exception:
+    HAVE_AHOCORASICK = False
+
 from email_utils import EmailConfigError, send_summary_email
-from export_utils import MeetingExporter
-from nlp_processor import MeetingNLPProcessor
-from audio_processing.transcribe import transcribe_audio
-from audio_processing.diarize import diarize_audio
+from audio_processing.transcribe import (
+    clear_model_cache,
+    load_faster_whisper,
+    load_hf_whisper,
+    save_upload,
+    transcribe_with_whisper,
+)
+from audio_processing.vad import SAMPLE_RATE, load_audio
+from audio_processing.diarize import (
+    DIARIZATION_MODEL,
+    clear_pipeline_cache,
+    diarize_audio,
+    diarize_turns,
+    get_diarization_pipeline,
+    needs_diarization,
+    single_speaker_segments,
+)
 from audio_processing.transcript_parser import parse_transcript_with_timestamps, has_timestamp_format
 from summarizer.summarize import chunk_transcript
 from summarizer.bart_summarizer import (
-    summarize_chunks_bart,
-    merge_summaries_text,
-    summarize_global,
+    default_device,
+    load_bart_summarizer,
+    summarize_hierarchical,
     build_topic_bullets_from_chunks,
     merge_bullet_summaries,
 )
@@ -32,31 +65,316 @@ st.set_page_config(
     layout="wide"
 )
 
+# scratch space for uploaded audio and debug JSON; created once at import
+_TMP_DIR = Path(tempfile.gettempdir()) / "meeting_ai"
+_TMP_DIR.mkdir(parents=True, exist_ok=True)
+
+# use a lighter distilBART model for faster inference
+SUMMARIZER_MODEL = "sshleifer/distilbart-cnn-12-6"
+
+@st.cache_resource(show_spinner=False)
+def _get_whisper(model_name: str):
+    # loaded once per process; repeated uploads reuse the same weights
+    return load_hf_whisper(model_name)
+
+@st.cache_resource(show_spinner=False)
+def _get_faster_whisper(model_name: str, device: str = "cpu", compute_type: str = "int8"):
+    # CTranslate2 model, one per (model, device, compute type); None when
+    # faster-whisper isn't installed
+    try:
+        return load_faster_whisper(model_name, device=device, compute_type=compute_type)
+    except ValueError:
+        # CTranslate2 rejects compute types the device can't run efficiently
+        # (e.g. float16 on an older GPU); int8 works everywhere
+        if compute_type == "int8":
+            raise
+        return load_faster_whisper(model_name, device=device, compute_type="int8")
+
+@st.cache_resource(show_spinner=False)
+def _get_summarizer(model_name: str, device: int = -1, quantize: bool = True):
+    # one pipeline per (model, device) for the whole process, shared across reruns;
+    # int8 weights on CPU, 8-bit/float16 on GPU
+    return load_bart_summarizer(model_name=model_name, device=device, quantize=quantize)
+
+@st.cache_resource(show_spinner=False)
+def _get_nlp_processor():
+    # loads spaCy once per process instead of on every build_structure call
+    from nlp_processor import MeetingNLPProcessor
+    return MeetingNLPProcessor()
+
+@st.cache_resource(show_spinner=False)
+def _get_executor():
+    # single background worker so summarization never blocks the script thread
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="aims-summarize")
+
+@st.cache_resource(show_spinner=False)
+def _get_diarize_executor():
+    # one pyannote run at a time, reused across reruns and sessions
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="aims-diarize")
+
+@st.cache_resource(show_spinner=False)
+def _get_diarizer():
+    # the diarize module's shared pyannote pipeline (GPU when available), so there
+    # is one copy; None without pyannote or model access, kept until models are released
+    return get_diarization_pipeline()
+
+def _can_overlap_diarization() -> bool:
+    # pyannote next to Whisper only pays off with a GPU or enough cores to split
+    try:
+        import torch
+        if torch.cuda.device_count() >= 1:
+            return True
+    except Exception:
+        pass
+    return (os.cpu_count() or 1) >= 4
+
+def _release_models():
+    """Drop every cached model so export/rendering doesn't compete with them for memory."""
+    for loader in (_get_whisper, _get_faster_whisper, _get_summarizer, _get_diarizer):
+        loader.clear()
+    clear_model_cache()
+    clear_pipeline_cache()
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except Exception:
+        pass
+
+def _run_pipeline(chunks, segments_for_summarizer, full_text, summarizer, nlp, on_summary=None,
+                  quantize=False):
+    """
+    Chunk summaries -> global summary -> structured minutes.
+    Runs on the worker thread, so it must not call any st.* API.
+    """
+    summaries, global_summary = summarize_hierarchical(
+        chunks,
+        model_name=SUMMARIZER_MODEL,
+        device=default_device(),
+        summarizer=summarizer,
+        on_summary=on_summary,
+        quantize=quantize,
+    )
+    topic_summary = build_topic_bullets_from_chunks(summaries)
+    if topic_summary:
+        final_summary = merge_bullet_summaries(topic_summary, global_summary)
+    else:
+        final_summary = merge_bullet_summaries(global_summary, "")
+    final_summary = _sanitize(final_summary)
+    # sanitize full text for metadata parsing/display
+    structured = build_structure(segments_for_summarizer, final_summary, full_text, processor=nlp)
+    # 🛑 Ensure agenda does NOT merge into decisions/summary/action items
+    if isinstance(structured.get("agenda"), list):
+        structured["agenda"] = [
+            {"title": a.get("title", "") if isinstance(a, dict) else str(a)}
+            for a in structured["agenda"]
+        ]
+    return structured
+
+def _text_digest(text: str) -> str:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+# finished minutes per (transcript hash, model, precision), shared by all sessions,
+# so processing the same transcript again skips the summarizer entirely
+_RESULT_CACHE_SIZE = 8
+
+@st.cache_resource(show_spinner=False)
+def _result_store():
+    return OrderedDict(), threading.Lock()
+
+def _cached_result(key):
+    store, lock = _result_store()
+    with lock:
+        hit = store.get(key)
+        if hit is None:
+            return None
+        store.move_to_end(key)
+    # callers edit processed_data in place; never hand out the stored object
+    return copy.deepcopy(hit)
+
+def _store_result(key, structured):
+    store, lock = _result_store()
+    with lock:
+        store[key] = copy.deepcopy(structured)
+        store.move_to_end(key)
+        while len(store) > _RESULT_CACHE_SIZE:
+            store.popitem(last=False)
+
+def _set_processed(structured, full_text, text_hash):
+    st.session_state.processed_data = structured
+    st.session_state.processed_version = st.session_state.get("processed_version", 0) + 1
+    st.session_state.current_transcript = full_text
+    st.session_state.processed_hash = text_hash
+
+def _start_processing_job(chunks, segments_for_summarizer, full_text, summarizer, text_hash=None,
+                          result_key=None, quantize=False):
+    partial = []
+    # cached resources are fetched here, on the script thread
+    future = _get_executor().submit(
+        _run_pipeline, chunks, segments_for_summarizer, full_text, summarizer,
+        _get_nlp_processor(), partial.append, quantize=quantize,
+    )
+    st.session_state.job = {
+        "future": future,
+        "partial": partial,
+        "total": len(chunks),
+        "full_text": full_text,
+        "text_hash": text_hash,
+        "result_key": result_key,
+    }
+
+@st.fragment(run_every=1.0)
+def _job_status():
+    """Poll the background job; show chunk summaries as they finish."""
+    job = st.session_state.get("job")
+    if job is None:
+        return
+    future = job["future"]
+    if future.done():
+        st.session_state.job = None
+        try:
+            structured = future.result()
+        except Exception as e:
+            st.error(f"Processing failed: {e}")
+            return
+        if job.get("result_key") is not None:
+            _store_result(job["result_key"], structured)
+        _set_processed(structured, job["full_text"], job.get("text_hash"))
+        st.toast("✅ Transcript processed successfully! Navigate to 'Summary' to view results.")
+        st.rerun()
+
+    done, total = len(job["partial"]), max(job["total"], 1)
+    st.info("⏳ Processing transcript in the background. You can keep navigating.")
+    st.progress(min(done / total, 1.0), text=f"Summarized {done} of {job['total']} chunks")
+    if job["partial"]:
+        with st.expander("Chunk summaries so far"):
+            for item in job["partial"]:
+                st.markdown(f"- {item.get('summary', '')}")
+
+# runs of unicode block/box drawing characters (U+2500-U+25FF) -> one plain dash
+_BOX_RUN_RE = re.compile(r"[\u2500-\u25FF]+")
+# two or more dashes, optionally space-separated ("- - -", "--")
+_DASH_RE = re.compile(r"-(?:\s*-)+")
+_LINE_RE = re.compile(r"^-{5,}$", re.MULTILINE)
+_SENT_BOUNDARY_RE = re.compile(r"(?<=[.!?])\s+")
+# sentence ends and newlines folded to "." / " " so _as_bullets needs one plain split
+_BULLET_TABLE = str.maketrans({"?": ".", "!": ".", "\n": " "})
+
+_SEGMENT_LINE = "{0[speaker]}: {0[text]}".format
+
+def _join_segments(segments) -> str:
+    """
+    'Speaker: text' lines. Segments come from diarize_audio, single_speaker_segments
+    or the transcript parser, which all set 'speaker' and 'text' to strings, so the
+    keys are read directly instead of through .get() defaults.
+    """
+    return "\n".join(map(_SEGMENT_LINE, segments))
+
 def _as_bullets(text: str):
     try:
-        raw = (text or "").replace("\n", " ").strip()
+        raw = (text or "").translate(_BULLET_TABLE).strip()
         if not raw:
             return []
         # simple sentence split; avoid heavy NLP for speed
-        parts = [p.strip() for p in raw.replace("?", ".").replace("!", ".").split(".")]
-        bullets = [p for p in parts if p]
         # cap to reasonable number for UI readability
-        return bullets[:20]
+        parts = (p.strip() for p in raw.split("."))
+        return [p for p in parts if p][:20]
     except Exception:
         return []
 
+@lru_cache(maxsize=128)
 def _sanitize(s: str) -> str:
+    # pure str -> str; reruns with an unchanged summary are served from the LRU
+    if not s:
+        return ""
     try:
-        import re
-        # replace unicode block/box drawing characters with a standard small dash separator
-        t = re.sub(r"[\u2580-\u259F\u2500-\u257F\u25A0-\u25FF]+", "-", s or "")
+        t = _BOX_RUN_RE.sub("-", s)
+        if "-" not in t:
+            # common case: nothing for the dash regexes to do
+            return t.strip()
         # collapse long runs of dashes to '----'
-        t = re.sub(r"-\s*-+", "----", t)
-        t = re.sub(r"^-{5,}$", "----", t, flags=re.MULTILINE)
+        t = _DASH_RE.sub("----", t)
+        t = _LINE_RE.sub("----", t)
         return t.strip()
     except Exception:
-        return (s or "").strip()
+        return s.strip()
     
+def _split_summary(text: str):
+    """Split a summary into (paragraph lines, bullet lines) in one pass."""
+    paragraph_lines, bullet_points = [], []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        (bullet_points if line.startswith(("-", "•")) else paragraph_lines).append(line)
+    return paragraph_lines, bullet_points
+
+@st.cache_data(show_spinner=False)
+def _build_formal_summary(summary: str):
+    # summary tab reruns on every keystroke; only recompute when the text changes
+    raw = _sanitize(summary)
+    paragraph_lines, bullet_points = _split_summary(raw)
+    return raw, paragraph_lines, bullet_points
+
+# patterns used by _sanitize_for_export, compiled once
+# speaker labels and filler words in one alternation
+_EXPORT_CLEAN_RE = re.compile(
+    r"Speaker\s*\d*:?|\b(?:ma|am|ok|umm+|uh+|almost done|done)\b", re.IGNORECASE
+)
+# box/line drawing characters (U+2500-U+259F) are deleted
+_EXPORT_BOX_TRANS = dict.fromkeys(range(0x2500, 0x25A0))
+_WS_RE = re.compile(r"\s+")
+_AGREED_RE = re.compile(r"\b(agreed\.?|agreement)\b\.?", re.IGNORECASE)
+# leading filler of an action item, each part optional and in this order,
+# with any " -.," between them (see strip_action_prefix)
+_ACTION_PREFIX_RE = re.compile(
+    r"^(?:(?:the\s+)?concerned\s+staff\s+will\s+[\s\-.,]*)?"
+    r"(?:everyone\s+okay\s+with\s+that[\?\.]?\s*[\s\-.,]*)?"
+    r"(?:and\s+i\s+will\s+[\s\-.,]*)?"
+    r"(?:i\s+will\s+[\s\-.,]*)?"
+    r"(?:we\s+will\s+[\s\-.,]*)?",
+    re.IGNORECASE,
+)
+# prompt text that sometimes leaks into model output
+_INSTRUCTION_PHRASES = (
+    "create a clear professional meeting summary",
+    "format:",
+    "transcript:",
+    "speaker names or filler words",
+    "meeting summary format",
+)
+_INSTRUCTION_RE = re.compile("|".join(map(re.escape, _INSTRUCTION_PHRASES)), re.IGNORECASE)
+
+class _TitleMatcher:
+    """
+    Finds which agenda titles occur in a string. With pyahocorasick this is one
+    linear scan per string regardless of how many titles there are; otherwise a
+    substring test per title. Titles are kept longest first, and find() returns
+    them in that order so callers can strip the longest match greedily.
+    """
+
+    def __init__(self, titles):
+        self.titles = sorted(set(titles), key=len, reverse=True)
+        self._automaton = None
+        if HAVE_AHOCORASICK and self.titles:
+            automaton = ahocorasick.Automaton()
+            for title in self.titles:
+                automaton.add_word(title, title)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def find(self, text: str) -> list:
+        if self._automaton is not None:
+            hits = {title for _, title in self._automaton.iter(text)}
+            return [title for title in self.titles if title in hits]
+        return [title for title in self.titles if title in text]
+
+    def any(self, text: str) -> bool:
+        if self._automaton is not None:
+            return next(self._automaton.iter(text), None) is not None
+        return any(title in text for title in self.titles)
+
 def _sanitize_for_export(structured):
     """
     Improved sanitization to ensure:
@@ -65,7 +383,6 @@ def _sanitize_for_export(structured):
       - decisions are short strings (no dicts)
       - action items are cleaned and not whole-summary text
     """
-    import re
     if not structured or not isinstance(structured, dict):
         return structured
 
@@ -76,51 +393,37 @@ def _sanitize_for_export(structured):
     def clean_text(s):
         if not s:
             return ""
-        s = re.sub(r"Speaker\s*\d*:?", "", str(s), flags=re.IGNORECASE)   # remove speaker labels
-        s = re.sub(r"\b(ma|am|ok|umm+|uh+|almost done|done)\b", "", s, flags=re.IGNORECASE)
-        s = re.sub(r"[\u2500-\u259F]+", "", s)  # remove box/line unicode
-        s = re.sub(r"\s+", " ", s).strip()
+        s = _EXPORT_CLEAN_RE.sub("", str(s)).translate(_EXPORT_BOX_TRANS)
+        s = _WS_RE.sub(" ", s).strip()
         return s
 
-    instruction_phrases = (
-        "create a clear professional meeting summary",
-        "format:",
-        "transcript:",
-        "speaker names or filler words",
-        "meeting summary format",
-    )
-
     def is_instruction(text: str) -> bool:
-        t = (text or "").lower()
-        return any(phrase in t for phrase in instruction_phrases)
-
-    action_prefix_patterns = [
-        r"^(?:the\s+)?concerned\s+staff\s+will\s+",
-        r"^everyone\s+okay\s+with\s+that[\?\.]?\s*",
-        r"^and\s+i\s+will\s+",
-        r"^i\s+will\s+",
-        r"^we\s+will\s+",
-    ]
+        return _INSTRUCTION_RE.search(text or "") is not None
 
     def strip_action_prefix(text: str) -> str:
         if not text:
             return ""
-        cleaned = text
-        for pattern in action_prefix_patterns:
-            cleaned = re.sub(pattern, "", cleaned, flags=re.IGNORECASE).strip(" -.,")
+        # the match always succeeds (every part is optional); one pass strips them all
+        cleaned = text.strip(" -.,")
+        cleaned = cleaned[_ACTION_PREFIX_RE.match(cleaned).end():].strip(" -.,")
         return cleaned or text.strip()
 
     def compact_sentence(blob: str, limit: int = 220) -> str:
         if not blob:
             return ""
-        parts = re.split(r"(?<=[.!?])\s+", blob)
+        # first sentence of at least three words; stops scanning as soon as one is found
         chosen = ""
-        for part in parts:
-            candidate = part.strip(" -•")
-            if not candidate or len(candidate.split()) < 3:
-                continue
-            chosen = candidate
-            break
+        pos = 0
+        for m in _SENT_BOUNDARY_RE.finditer(blob):
+            candidate = blob[pos:m.start()].strip(" -•")
+            if len(candidate.split(None, 2)) == 3:
+                chosen = candidate
+                break
+            pos = m.end()
+        else:
+            candidate = blob[pos:].strip(" -•")
+            if len(candidate.split(None, 2)) == 3:
+                chosen = candidate
         if not chosen:
             chosen = blob.strip()
         if len(chosen) > limit:
@@ -130,7 +433,7 @@ def _sanitize_for_export(structured):
     def clean_decision_text(text: str) -> str:
         if not text:
             return ""
-        cleaned = re.sub(r"\b(agreed\.?|agreement)\b\.?", "", text, flags=re.IGNORECASE).strip(" -.," )
+        cleaned = _AGREED_RE.sub("", text).strip(" -.," )
         return cleaned or text
 
     # ----- 1) Normalize agenda to list of {title:..}
@@ -146,50 +449,35 @@ def _sanitize_for_export(structured):
             clean_ag.append({"title": title})
     data["agenda"] = clean_ag
 
-    # Build set of agenda titles for dedup checks (lowercased, short form)
-    agenda_titles_set = set()
-    for a in clean_ag:
-        t = a.get("title","")
-        if t:
-            agenda_titles_set.add(t.lower())
+    # agenda titles for dedup checks, lowercased once here (clean_ag titles are non-empty)
+    agenda_matcher = _TitleMatcher(a["title"].lower() for a in clean_ag)
 
     # get summary text for reference
     summary_text = clean_text(data.get("summary",""))
 
-    # ----- 2) Clean decisions: keep only meaningful short strings
-    raw_decisions = data.get("decisions", []) or []
-    clean_decisions = []
+    # ----- 2) Per-item cleaners for the list sections; None drops the item
     seen_dec = set()
-    for d in raw_decisions:
+    seen_tasks = set()
+
+    def clean_decision(d):
         # accept dicts or strings
         if isinstance(d, dict):
             text = d.get("text") or d.get("decision") or ""
         else:
             text = str(d or "")
-        text = clean_text(text)
-        text = clean_decision_text(text)
-        if not text or is_instruction(text):
-            continue
-        # drop if it's identical/contains an agenda title
+        text = clean_decision_text(clean_text(text))
+        # drop instructions and noise (too long)
+        if not text or is_instruction(text) or len(text) > 500:
+            return None
+        # drop if it's identical/contains an agenda title, then dedupe
         lowered = text.lower()
-        if any(agt in lowered for agt in agenda_titles_set):
-            continue
-        # drop if it's too long (likely noise)
-        if len(text) > 500:
-            continue
-        # dedupe
-        if lowered in seen_dec:
-            continue
+        if agenda_matcher.any(lowered) or lowered in seen_dec:
+            return None
         seen_dec.add(lowered)
-        clean_decisions.append(text)
-    data["decisions"] = clean_decisions
+        return text
 
-    # ----- 3) Clean action_items: ensure task/responsible/deadline structure and remove agenda leaks
-    raw_actions = data.get("action_items", []) or []
-    clean_actions = []
-    seen_tasks = set()
-    for a in raw_actions:
-        # unify representation
+    def clean_action(a):
+        # ensure task/responsible/deadline structure and remove agenda leaks
         if isinstance(a, dict):
             task = a.get("task","") or a.get("text","") or ""
             responsible = a.get("responsible","") or a.get("owner","") or ""
@@ -199,82 +487,84 @@ def _sanitize_for_export(structured):
             responsible = ""
             deadline = ""
 
-        task = clean_text(task)
-        task = strip_action_prefix(task)
-        responsible = clean_text(responsible)
-        deadline = clean_text(deadline)
-
+        task = strip_action_prefix(clean_text(task))
         if not task or is_instruction(task):
-            continue
+            return None
         # drop if task is basically the whole summary or contains it (prevents whole-summary-in-task bug)
         if summary_text and len(task) > 120 and task in summary_text:
-            continue
+            return None
         # drop if task equals or contains an agenda title
         lowered_task = task.lower()
-        if any(agt in lowered_task for agt in agenda_titles_set):
+        found_titles = agenda_matcher.find(lowered_task)
+        if found_titles:
             # if it contains agenda title but has extra useful words, try to remove the agenda title chunk
-            for agt in agenda_titles_set:
+            for agt in found_titles:
                 if agt in lowered_task and len(lowered_task) > len(agt) + 10:
                     # attempt to strip the title substring
                     task = re.sub(re.escape(agt), "", task, flags=re.IGNORECASE).strip()
                     lowered_task = task.lower()
-        # after attempted strip, if still matches agenda, skip
-        if any(agt == lowered_task or agt in lowered_task for agt in agenda_titles_set):
-            continue
+            # after attempted strip, if still matches agenda, skip
+            if agenda_matcher.any(lowered_task):
+                return None
 
         # drop extremely long noise
         if len(task) > 600:
             task = task[:400].rstrip() + "..."
-
         task = compact_sentence(task)
 
         # dedupe tasks
         if lowered_task in seen_tasks:
-            continue
+            return None
         seen_tasks.add(lowered_task)
+        return {"task": task, "responsible": clean_text(responsible), "deadline": clean_text(deadline)}
 
-        clean_actions.append({
-            "task": task,
-            "responsible": responsible,
-            "deadline": deadline
-        })
-
-    data["action_items"] = clean_actions
-
-    # ----- 4) Ensure attendees is list of dicts with name/role cleaned
-    raw_att = data.get("attendees", []) or []
-    clean_att = []
-    for at in raw_att:
+    def clean_attendee(at):
         if isinstance(at, dict):
             name = clean_text(at.get("name",""))
             role = clean_text(at.get("role",""))
         else:
             name = clean_text(at)
             role = ""
-        if name:
-            clean_att.append({"name": name, "role": role})
-    data["attendees"] = clean_att
-
-    # ----- 5) Finally, ensure other lists (keywords, entity_actions) are cleaned lightly
-    if isinstance(data.get("keywords", None), list):
-        data["keywords"] = [clean_text(k) for k in data.get("keywords", []) if clean_text(k)]
-    if isinstance(data.get("entity_actions", None), list):
-        cleaned_ea = []
-        for ea in data.get("entity_actions", []):
-            if not isinstance(ea, dict):
-                continue
-            ent = clean_text(ea.get("entity",""))
-            label = clean_text(ea.get("label",""))
-            action = clean_text(ea.get("action",""))
-            obj = clean_text(ea.get("object",""))
-            snippet = clean_text(ea.get("snippet",""))
-            if ent:
-                cleaned_ea.append({"entity":ent,"label":label,"action":action,"object":obj,"snippet":snippet})
-        data["entity_actions"] = cleaned_ea
+        return {"name": name, "role": role} if name else None
+
+    def clean_keyword(k):
+        return clean_text(k) or None
+
+    def clean_entity_action(ea):
+        if not isinstance(ea, dict):
+            return None
+        ent = clean_text(ea.get("entity",""))
+        if not ent:
+            return None
+        return {
+            "entity": ent,
+            "label": clean_text(ea.get("label","")),
+            "action": clean_text(ea.get("action","")),
+            "object": clean_text(ea.get("object","")),
+            "snippet": clean_text(ea.get("snippet","")),
+        }
+
+    # ----- 3) One walk over every list section; keywords/entity_actions are only
+    # touched when present as lists
+    handlers = {
+        "decisions": clean_decision,
+        "action_items": clean_action,
+        "attendees": clean_attendee,
+        "keywords": clean_keyword,
+        "entity_actions": clean_entity_action,
+    }
+    for section, handler in handlers.items():
+        items = data.get(section)
+        if section in ("keywords", "entity_actions") and not isinstance(items, list):
+            continue
+        data[section] = [c for c in map(handler, items or []) if c is not None]
 
     return data
 
 
+# leading bullet/number marker left over in summary sentences
+_EMAIL_BULLET_RE = re.compile(r"^[\-\•\*\d+\.]\s*")
+
 def _build_email_body(structured: dict) -> str:
     """
     Compose a plain-text email body with ONLY bullet points in strict order:
@@ -283,89 +573,276 @@ def _build_email_body(structured: dict) -> str:
     if not structured:
         return ""
 
-    import re
-    
-    agenda = structured.get("agenda", []) or []
-    summary = _sanitize(structured.get("summary", ""))
-    action_items = structured.get("action_items", []) or []
-    decisions = structured.get("decisions", []) or []
-    metadata = structured.get("metadata", {})
-    
-    lines = []
-    
+    agenda = structured.get("agenda") or []
+    summary = _sanitize(structured.get("summary") or "")
+    action_items = structured.get("action_items") or []
+    decisions = structured.get("decisions") or []
+
+    buf = StringIO()
+    w = buf.write
+
     # 1. Agenda (bullet points only)
     if agenda:
-        lines.append("Agenda")
+        w("Agenda\n")
         for item in agenda:
-            title = item.get("title", "") if isinstance(item, dict) else str(item)
-            title = title.strip()
+            title = (item.get("title") or "" if isinstance(item, dict) else str(item)).strip()
             if title:
-                lines.append(f"• {title}")
-        lines.append("")
-    
-    # 2. Discussion Summary (convert to bullet points)
+                w(f"• {title}\n")
+        w("\n")
+
+    # 2. Discussion Summary (sentences as bullets, existing markers removed)
     if summary:
-        lines.append("Discussion Summary")
-        # Split summary into sentences and convert to bullets
-        sentences = re.split(r"(?<=[.!?])\s+", summary)
-        for sent in sentences:
+        w("Discussion Summary\n")
+        for sent in _SENT_BOUNDARY_RE.split(summary):
             sent = sent.strip()
-            if sent and len(sent) > 3:
-                # Remove existing bullet markers
-                sent = re.sub(r"^[\-\•\*\d+\.]\s*", "", sent)
-                lines.append(f"• {sent}")
-        lines.append("")
-    
+            if len(sent) > 3:
+                w(f"• {_EMAIL_BULLET_RE.sub('', sent)}\n")
+        w("\n")
+
     # 3. Action Items (bullet points only)
     if action_items:
-        lines.append("Action Items")
+        w("Action Items\n")
         for item in action_items:
-            task = item.get("task", "").strip()
+            task = (item.get("task") or "").strip()
             if not task:
                 continue
-            responsible = item.get("responsible", "").strip()
-            deadline = item.get("deadline", "").strip()
-            bullet = f"• {task}"
+            responsible = (item.get("responsible") or "").strip()
+            deadline = (item.get("deadline") or "").strip()
+            w(f"• {task}")
             if responsible:
-                bullet += f" — {responsible}"
+                w(f" — {responsible}")
             if deadline:
-                bullet += f" (Due: {deadline})"
-            lines.append(bullet)
-        lines.append("")
-    
-    # 4. Decisions (only if provided, bullet points only)
+                w(f" (Due: {deadline})")
+            w("\n")
+        w("\n")
+
+    # 4. Decisions (placeholder bullet when none were provided)
+    w("Decisions\n")
     if decisions:
-        lines.append("Decisions")
         for dec in decisions:
             dec_text = str(dec).strip()
             if dec_text:
-                lines.append(f"• {dec_text}")
-        lines.append("")
+                w(f"• {dec_text}\n")
     else:
-        lines.append("Decisions")
-        lines.append("• (No decisions provided)")
-        lines.append("")
-    
-    # 5. Closing Note
-    lines.append("Closing Note")
-    date_str = datetime.now().strftime("%d/%m/%Y at %H:%M")
-    lines.append(f"• Meeting minutes generated on {date_str}.")
-    
-    return "\n".join(lines).strip()
+        w("• (No decisions provided)\n")
+    w("\n")
 
-def extract_text_from_pdf(pdf_file):
+    # 5. Closing Note
+    w("Closing Note\n")
+    w(f"• Meeting minutes generated on {datetime.now().strftime('%d/%m/%Y at %H:%M')}.")
+
+    return buf.getvalue().strip()
+
+_PDF_PAGE_BATCH = 10
+
+@st.cache_data(show_spinner=False)
+def _extract_pdf_text(data: bytes, preserve_layout: bool = False) -> str:
+    # keyed on the file bytes, so re-uploading the same PDF skips extraction.
+    # `data` is the only copy of the upload; every reader wraps it in its own
+    # BytesIO, which shares the bytes instead of copying them.
+    if HAVE_PDFIUM and not preserve_layout:
+        import pypdfium2 as pdfium
+        try:
+            text = _pdfium_text(data)
+        except pdfium.PdfiumError:
+            text = ""
+        if text.strip():
+            return text
+        # nothing extractable by PDFium (damaged or unusual file): try pypdf next
     text = ""
+    if not preserve_layout:
+        # pypdf/PyPDF2 is much faster than pdfplumber and enough for text-only
+        # transcripts; pdfplumber only runs when it finds no text
+        try:
+            text = _pypdf_text(data)
+        except Exception:
+            text = ""
+        if text.strip():
+            return text
+    import pdfplumber
+    try:
+        with pdfplumber.open(BytesIO(data)) as pdf:
+            n_pages = len(pdf.pages)
+        return _extract_pages_parallel(data, n_pages, _plumber_batch)
+    except Exception:
+        if not preserve_layout:
+            return text
+    # layout mode and pdfplumber failed: last try with pypdf; a damaged file
+    # yields "" rather than an exception in the UI
+    try:
+        return _pypdf_text(data)
+    except Exception:
+        return ""
+
+def _pdf_reader():
+    if HAVE_PYPDF:
+        from pypdf import PdfReader
+    else:
+        from PyPDF2 import PdfReader
+    return PdfReader
+
+def _pypdf_text(data: bytes) -> str:
+    n_pages = len(_pdf_reader()(BytesIO(data)).pages)
+    return _extract_pages_parallel(data, n_pages, _pypdf_batch)
+
+def _pdfium_text(data: bytes) -> str:
+    """Plain text via PDFium; page and textpage handles are closed as we go."""
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(data)
+    parts = []
     try:
-        with pdfplumber.open(pdf_file) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-    except:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-    return text
+        for i in range(len(pdf)):
+            page = pdf[i]
+            textpage = page.get_textpage()
+            try:
+                parts.append(textpage.get_text_range())
+            finally:
+                textpage.close()
+                page.close()
+    finally:
+        pdf.close()
+    return "\n".join(parts)
+
+def _plumber_batch(data: bytes, indices):
+    # each worker opens its own document restricted to its pages (1-based)
+    import pdfplumber
+    with pdfplumber.open(BytesIO(data), pages=[i + 1 for i in indices]) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages]
+
+def _pypdf_batch(data: bytes, indices):
+    reader = _pdf_reader()(BytesIO(data))
+    return [reader.pages[i].extract_text() or "" for i in indices]
+
+def _extract_pages_parallel(data: bytes, n_pages: int, extract_batch) -> str:
+    """
+    Extract page text in batches of _PDF_PAGE_BATCH pages on a thread pool.
+    Every batch parses its own copy of the document, so no parser state is shared.
+    """
+    batches = [
+        list(range(b, min(b + _PDF_PAGE_BATCH, n_pages)))
+        for b in range(0, n_pages, _PDF_PAGE_BATCH)
+    ]
+    if len(batches) <= 1:
+        # a single batch isn't worth a thread pool
+        texts = extract_batch(data, batches[0]) if batches else []
+    else:
+        workers = min(8, os.cpu_count() or 1, len(batches))
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            # map() yields in submission order, so pages stay in order
+            texts = [t for batch_texts in ex.map(lambda b: extract_batch(data, b), batches)
+                     for t in batch_texts]
+    return "\n".join(t for t in texts if t)
+
+@st.cache_data(show_spinner=False)
+def _decode_text_file(digest: str, _buf) -> str:
+    # decode straight from the upload's memoryview; no intermediate bytes copy
+    return str(_buf, "utf-8", errors="replace")
+
+_TRANSCRIPT_CACHE_SIZE = 8
+
+@st.cache_resource(show_spinner=False)
+def _transcript_store():
+    # (sha256 of upload, model) -> (audio_path, transcript, json_path), shared by all sessions
+    return OrderedDict(), threading.Lock()
+
+def _load_or_none(loader, *args):
+    """
+    Call a cached model loader; None on any failure (download, offline mode, bad
+    model id) so transcribe_with_whisper moves on to its next tier and reports
+    errors through transcript["error"]. cache_resource doesn't keep failures.
+    """
+    try:
+        return loader(*args)
+    except Exception:
+        return None
+
+def _transcript_hit(digest: str, model_name: str, compute_type: str):
+    """Stored (audio_path, transcript, json_path) for this upload, or None."""
+    store, lock = _transcript_store()
+    key = (digest, model_name, compute_type)
+    with lock:
+        hit = store.get(key)
+        # the temp dir may have been cleaned up since the result was stored
+        if hit and os.path.exists(hit[0]):
+            store.move_to_end(key)
+            return hit
+    return None
+
+_TURNS_CACHE_SIZE = 8
+
+@st.cache_resource(show_spinner=False)
+def _turns_store():
+    # (sha256 of upload, diarization model) -> Future of pyannote turns
+    return OrderedDict(), threading.Lock()
+
+def _diarize_cached(digest: str, diarizer, audio_input, mixed_precision: bool = True):
+    """
+    Future for the pyannote turns of an upload, started at most once per
+    (sha256, model) on the shared diarization worker. Reruns and other sessions
+    get the same future, running or done; failed runs are dropped and retried.
+    `audio_input()` is only called when a new run has to be started.
+    """
+    store, lock = _turns_store()
+    key = (digest, DIARIZATION_MODEL)
+    with lock:
+        future = store.get(key)
+        if future is not None and not (future.done() and future.exception() is not None):
+            store.move_to_end(key)
+            return future
+        future = _get_diarize_executor().submit(
+            diarize_turns, audio_input(), diarizer, mixed_precision=mixed_precision
+        )
+        store[key] = future
+        while len(store) > _TURNS_CACHE_SIZE:
+            store.popitem(last=False)
+    return future
+
+def _transcribe_cached(digest: str, model_name: str, audio_path: str, on_progress=None,
+                       batch_size: int = 8, load_signal=None, compute_type: str = "int8"):
+    """
+    Transcribe a saved upload once per (sha256, model). A plain LRU store is used rather
+    than st.cache_data because `on_progress` draws into elements created by the
+    caller, which cache_data cannot replay on a hit. Failed runs are not stored.
+    `load_signal()` returns the decoded audio when the caller needs it anyway, so a
+    miss transcribes from that instead of decoding the file a second time.
+    `compute_type` picks faster-whisper's weights/arithmetic (int8, float16, ...).
+    """
+    hit = _transcript_hit(digest, model_name, compute_type)
+    if hit:
+        return hit
+
+    store, lock = _transcript_store()
+    key = (digest, model_name, compute_type)
+    device = "cuda" if default_device() >= 0 else "cpu"
+    fast_model = _load_or_none(_get_faster_whisper, model_name, device, compute_type)
+    json_path = str(Path(audio_path).with_name(Path(audio_path).stem + "_transcript.json"))
+    transcript = transcribe_with_whisper(
+        audio_path,
+        model_name=model_name,
+        out_json=json_path,
+        batch_size=batch_size,
+        vad="webrtc",
+        # HF Whisper is only loaded when faster-whisper is unavailable
+        model=None if fast_model else _load_or_none(_get_whisper, model_name),
+        fast_model=fast_model,
+        on_progress=on_progress,
+        audio=load_signal() if load_signal else None,
+    )
+    result = (audio_path, transcript, json_path)
+    if audio_path and not transcript.get("error"):
+        with lock:
+            store[key] = result
+            store.move_to_end(key)
+            while len(store) > _TRANSCRIPT_CACHE_SIZE:
+                store.popitem(last=False)
+    return result
+
+def extract_text_from_pdf(pdf_file, preserve_layout: bool = False):
+    """
+    Extract text with PDFium (one native call per page), then pypdf/PyPDF2.
+    pdfplumber is only used when `preserve_layout` is set or neither finds any text.
+    """
+    return _extract_pdf_text(pdf_file.getvalue(), preserve_layout)
 
 def main():
     # Initialize session state
@@ -375,6 +852,8 @@ def main():
         st.session_state.current_transcript = ""
     if 'current_page' not in st.session_state:
         st.session_state.current_page = "Home"
+    if 'job' not in st.session_state:
+        st.session_state.job = None
     
     # Sidebar Navigation
     st.sidebar.title("📝 AIMS")
@@ -397,6 +876,9 @@ def main():
     )
     page = next(value for label, value in nav_items if label == selected_label)
     st.session_state.current_page = page
+
+    if st.session_state.job is not None:
+        _job_status()
     
     # Route to appropriate page
     if page == "Home":
@@ -463,118 +945,236 @@ def upload_transcribe_page():
     
     elif input_method == "Upload PDF":
         uploaded_file = st.sidebar.file_uploader("Upload PDF transcript", type=['pdf'])
+        preserve_layout = st.sidebar.checkbox(
+            "Preserve layout",
+            value=False,
+            help="Use pdfplumber's layout-aware extraction (slower)",
+        )
         if uploaded_file:
             with st.spinner("Extracting text from PDF..."):
-                transcript_text = extract_text_from_pdf(uploaded_file)
+                transcript_text = extract_text_from_pdf(uploaded_file, preserve_layout=preserve_layout)
+            if transcript_text.strip():
                 st.success("✅ PDF text extracted successfully!")
+            else:
+                st.warning("⚠️ No text could be extracted from this PDF; it may be damaged or scanned.")
     
     elif input_method == "Upload Text File":
         uploaded_file = st.sidebar.file_uploader("Upload text file", type=['txt'])
         if uploaded_file:
-            transcript_text = uploaded_file.read().decode('utf-8')
+            buf = uploaded_file.getbuffer()
+            transcript_text = _decode_text_file(hashlib.sha256(buf).hexdigest(), buf)
             st.success("✅ Text file loaded successfully!")
     
     elif input_method == "Upload Audio":
         uploaded_audio = st.sidebar.file_uploader("Upload audio file (.mp3/.wav/.m4a)", type=['mp3','wav','m4a'])
+        identify_speakers = st.sidebar.checkbox(
+            "Identify distinct speakers",
+            value=True,
+            help="Uncheck to skip diarization and label all speech as one speaker (much faster)",
+        )
+        use_pyannote = st.sidebar.checkbox(
+            "Use pyannote diarization",
+            value=False,
+            disabled=not identify_speakers,
+            help="More accurate speaker turns; needs pyannote.audio and Hugging Face model access",
+        )
+        mixed_precision = st.sidebar.checkbox(
+            "Use mixed precision (GPU)",
+            value=True,
+            disabled=not (identify_speakers and use_pyannote),
+            help="Run pyannote in fp16 on CUDA GPUs; ignored on CPU",
+        )
+        batch_size = st.sidebar.slider(
+            "Transcription batch size",
+            min_value=1,
+            max_value=32,
+            value=8,
+            help="Speech chunks decoded together; higher is faster but uses more memory",
+        )
+        # CTranslate2 has no fast float16 path on CPU
+        compute_type = st.sidebar.selectbox(
+            "Whisper compute type",
+            ["int8_float16", "float16", "int8"] if default_device() >= 0 else ["int8", "float32"],
+            help="Precision for faster-whisper; int8 is fastest on CPU. On GPU, int8_float16 "
+            "keeps int8 weights with float16 math and uses about half the memory of float16",
+        )
         if uploaded_audio:
             st.sidebar.info("Uploading and saving audio for processing...")
-            tmp_dir = os.path.join(tempfile.gettempdir(), "meeting_ai")
-            os.makedirs(tmp_dir, exist_ok=True)
+            # hash, directory and saved file are set up once per upload and session,
+            # not on every rerun
+            uploads = st.session_state.setdefault("_audio_uploads", {})
+            upload = uploads.get(uploaded_audio.file_id)
+            if upload is None:
+                digest = hashlib.sha256(uploaded_audio.getbuffer()).hexdigest()
+                # one directory per upload so a cached result never points at another file
+                tmp_dir = _TMP_DIR / digest[:16]
+                tmp_dir.mkdir(parents=True, exist_ok=True)
+                audio_path = tmp_dir / f"meeting_audio{Path(uploaded_audio.name).suffix or '.wav'}"
+                if not audio_path.exists():
+                    audio_path = Path(save_upload(uploaded_audio, str(tmp_dir)))
+                upload = uploads[uploaded_audio.file_id] = {
+                    "digest": digest, "tmp_dir": tmp_dir, "audio_path": audio_path,
+                }
+            digest, tmp_dir, audio_path = upload["digest"], upload["tmp_dir"], upload["audio_path"]
+
+            # decode the audio at most once per run and share it between
+            # transcription and diarization
+            decoded = {}
+
+            def _signal():
+                if "signal" not in decoded:
+                    try:
+                        decoded["signal"] = load_audio(str(audio_path), sr=SAMPLE_RATE)
+                    except Exception:
+                        decoded["signal"] = None
+                return decoded["signal"]
+
+            def _audio_input():
+                signal = _signal()
+                return str(audio_path) if signal is None else {"waveform": signal, "sample_rate": SAMPLE_RATE}
+
+            # pyannote only needs the audio, so when Whisper has real work to do,
+            # start it first and align its turns with the transcript segments
+            # afterwards; on a transcript hit it waits until diarization is needed
+            turns_future = None
+            diarizer = _get_diarizer() if identify_speakers and use_pyannote else None
+            if (
+                diarizer is not None
+                and _can_overlap_diarization()
+                and _transcript_hit(digest, "tiny", compute_type) is None
+            ):
+                turns_future = _diarize_cached(digest, diarizer, _audio_input, mixed_precision)
 
             st.info("Transcription may take several minutes depending on file length and model. Please wait...")
-            with st.spinner("Transcribing audio (this can take a while)..."):
-                # use tiny model for much faster test transcriptions
-                audio_path, transcript, transcript_json = transcribe_audio(
-                    uploaded_audio, tmp_dir=tmp_dir, model_name="tiny"
+            with st.status("Transcribing audio (this can take a while)...", expanded=True) as status:
+                bar = st.progress(0.0, text="Starting...")
+
+                def _on_progress(done_s, total_s):
+                    frac = min(done_s / total_s, 1.0) if total_s else 0.0
+                    bar.progress(frac, text=f"Transcribed {done_s:.0f}s of {total_s:.0f}s")
+
+                # use tiny model for much faster test transcriptions;
+                # batched faster-whisper when installed, else batched HF Whisper over VAD chunks
+                audio_path, transcript, transcript_json = _transcribe_cached(
+                    digest, "tiny", str(audio_path), _on_progress, batch_size=batch_size,
+                    load_signal=_signal if identify_speakers else None,
+                    compute_type=compute_type,
                 )
+                bar.progress(1.0, text="Done")
+                status.update(label="Transcription finished", state="complete", expanded=False)
 
+            if "has_tj" not in upload:
+                upload["has_tj"] = bool(transcript_json) and Path(transcript_json).exists()
+            has_tj = upload["has_tj"]
             # clear spinner and show immediate status
             if not audio_path:
                 st.error(f"Failed to save uploaded audio file. {transcript.get('error','')}")
             elif transcript.get("error"):
                 st.error(f"Transcription error: {transcript.get('error')}")
                 # expose saved transcript json for debugging if present
-                if transcript_json and os.path.exists(transcript_json):
+                if has_tj:
                     st.sidebar.markdown(f"Transcription saved: {transcript_json}")
+            elif not identify_speakers or not needs_diarization(transcript.get("segments", [])):
+                st.success("✅ Transcription complete.")
+                if identify_speakers:
+                    st.info("Only one speaker detected; skipping diarization.")
+                diarized = single_speaker_segments(transcript.get("segments", []))
+                transcript_text = _join_segments(diarized) or transcript.get("text", "")
             else:
                 st.success("✅ Transcription complete. Running speaker diarization...")
                 segments = transcript.get("segments", [])
-                diarize_json = os.path.join(tmp_dir, Path(uploaded_audio.name).stem + "_diarized.json")
+                diarize_json = tmp_dir / (Path(uploaded_audio.name).stem + "_diarized.json")
+                turns = None
+                # without a pipeline (no token, gated model, offline) diarize_audio
+                # must not try to load one again on every run
+                pyannote_ok = use_pyannote and diarizer is not None
+                if turns_future is None and diarizer is not None:
+                    turns_future = _diarize_cached(digest, diarizer, _audio_input, mixed_precision)
+                if turns_future is not None:
+                    try:
+                        turns = turns_future.result()
+                    except Exception:
+                        pyannote_ok = False  # go straight to the heuristic fallback
                 try:
-                    diarized = diarize_audio(audio_path, segments, out_json=diarize_json, use_pyannote=False)
+                    diarized = diarize_audio(
+                        _audio_input(), segments, out_json=diarize_json,
+                        use_pyannote=pyannote_ok,
+                        pipeline=diarizer,
+                        mixed_precision=mixed_precision,
+                        turns=turns,
+                    )
                 except Exception as e:
                     st.error(f"Diarization failed: {e}")
                     diarized = None
 
                 # build raw transcript text for metadata extraction if diarization succeeded
                 if diarized:
-                    transcript_text = "\n".join([f"{s.get('speaker','Speaker')}: {s.get('text','')}" for s in diarized])
+                    transcript_text = _join_segments(diarized)
                     st.success("✅ Diarization complete.")
                     # save for debugging
-                    if transcript_json and os.path.exists(transcript_json):
+                    if has_tj:
                         st.sidebar.markdown(f"Transcription saved: {transcript_json}")
-                    if diarize_json and os.path.exists(diarize_json):
-                        st.sidebar.markdown(f"Diarization saved: {diarize_json}")
+                    # diarize_audio writes out_json before returning segments
+                    st.sidebar.markdown(f"Diarization saved: {diarize_json}")
                 else:
                     # fallback to plain transcript text
                     transcript_text = transcript.get("text","")
 
     st.sidebar.markdown("---")
+    precision = st.sidebar.radio(
+        "Summarizer precision",
+        ["int8 (faster)", "float32 (full)"],
+        help="int8 uses dynamic quantization on CPU; on GPU it loads bitsandbytes 8-bit "
+        "weights, or float16 when bitsandbytes isn't installed",
+    )
     
     # When processing, if diarized exists prefer it
     if st.sidebar.button("🔄 Process Transcript", type="primary", use_container_width=True):
-        if (input_method == "Upload Audio" and diarized) or transcript_text.strip():
-            with st.spinner("Processing transcript..."):
-                # prefer diarized segments if available
-                if diarized:
-                    segments_for_summarizer = diarized
-                    full_text = transcript_text
-                elif has_timestamp_format(transcript_text):
-                    # Parse transcript with timestamps and speaker names
-                    segments_for_summarizer = parse_transcript_with_timestamps(transcript_text)
-                    # Build full text with speaker labels for metadata extraction
-                    full_text = "\n".join([f"{s.get('speaker','Speaker')}: {s.get('text','')}" for s in segments_for_summarizer])
-                    if not segments_for_summarizer:
-                        # Fallback if parsing failed
-                        full_text = transcript_text
-                        segments_for_summarizer = [{"speaker":"Speaker 1","start":0,"end":0,"text":full_text}]
-                else:
-                    # fall back to existing plain-text path: create simple segments
+        if st.session_state.job is not None:
+            st.warning("⏳ A transcript is already being processed.")
+        elif (input_method == "Upload Audio" and diarized) or transcript_text.strip():
+            # prefer diarized segments if available
+            if diarized:
+                segments_for_summarizer = diarized
+                full_text = transcript_text
+            elif has_timestamp_format(transcript_text):
+                # Parse transcript with timestamps and speaker names
+                segments_for_summarizer = parse_transcript_with_timestamps(transcript_text)
+                # Build full text with speaker labels for metadata extraction
+                full_text = _join_segments(segments_for_summarizer)
+                if not segments_for_summarizer:
+                    # Fallback if parsing failed
                     full_text = transcript_text
                     segments_for_summarizer = [{"speaker":"Speaker 1","start":0,"end":0,"text":full_text}]
-                # create slightly larger chunks to reduce total summarization calls
-                chunks = chunk_transcript(segments_for_summarizer, max_chars=2200)
-                # use a lighter distilBART model for faster inference
-                summaries = summarize_chunks_bart(
-                    chunks,
-                    model_name="sshleifer/distilbart-cnn-12-6",
-                    device=-1
+            else:
+                # fall back to existing plain-text path: create simple segments
+                full_text = transcript_text
+                segments_for_summarizer = [{"speaker":"Speaker 1","start":0,"end":0,"text":full_text}]
+            text_hash = _text_digest(full_text)
+            quantize = precision.startswith("int8")
+            result_key = (text_hash, SUMMARIZER_MODEL, quantize)
+            if st.session_state.processed_data and st.session_state.get("processed_hash") == text_hash:
+                # same transcript as the current results; keep them (and any edits)
+                st.info("ℹ️ Transcript unchanged since the last run; keeping the current results.")
+            elif (cached := _cached_result(result_key)) is not None:
+                # processed before (in this or another session): reuse the minutes
+                _set_processed(cached, full_text, text_hash)
+                st.toast("✅ Loaded previously processed results for this transcript.")
+                st.rerun()
+            else:
+                with st.spinner("Loading summarization model..."):
+                    summarizer = _get_summarizer(SUMMARIZER_MODEL, default_device(), quantize=quantize)
+                # size chunks to the model's context in tokens when the tokenizer is
+                # available; otherwise slightly larger char chunks to reduce summarization calls
+                chunks = chunk_transcript(
+                    segments_for_summarizer,
+                    max_chars=2200,
+                    tokenizer=getattr(summarizer, "tokenizer", None),
                 )
-                merged = merge_summaries_text(summaries)
-                topic_summary = build_topic_bullets_from_chunks(summaries)
-                global_summary = summarize_global(
-                    merged,
-                    model_name="sshleifer/distilbart-cnn-12-6",
-                    device=-1
+                _start_processing_job(
+                    chunks, segments_for_summarizer, full_text, summarizer, text_hash, result_key,
+                    quantize=quantize,
                 )
-                if topic_summary:
-                    final_summary = merge_bullet_summaries(topic_summary, global_summary)
-                else:
-                    final_summary = merge_bullet_summaries(global_summary, "")
-                final_summary = _sanitize(final_summary)
-                # sanitize full text for metadata parsing/display
-                structured = build_structure(segments_for_summarizer, final_summary, full_text)
-                # 🛑 Ensure agenda does NOT merge into decisions/summary/action items
-                if isinstance(structured.get("agenda"), list):
-                    structured["agenda"] = [
-                        {"title": a.get("title", "") if isinstance(a, dict) else str(a)}
-                        for a in structured["agenda"]
-                    ]
-
-                # 🔥 SANITIZE HERE (IMPORTANT)
-                st.session_state.processed_data = structured
-                st.session_state.current_transcript = full_text
-                st.success("✅ Transcript processed successfully! Navigate to 'Summary' to view results.")
                 st.rerun()
         else:
             st.error("⚠️ Please provide a transcript or audio file first!")
@@ -582,12 +1182,289 @@ def upload_transcribe_page():
     if st.sidebar.button("🗑️ Clear All", use_container_width=True):
         st.session_state.processed_data = None
         st.session_state.current_transcript = ""
+        st.session_state.processed_hash = None
+        st.session_state.job = None
         st.rerun()
+
+    job = st.session_state.get("job")
+    st.sidebar.button(
+        "🧹 Release models",
+        use_container_width=True,
+        on_click=_release_models,
+        disabled=bool(job and not job["future"].done()),
+        help="Free the transcription, diarization and summarization models; they reload on next use",
+    )
     
     if transcript_text:
         st.markdown("### Preview")
         st.text_area("Transcript Preview", transcript_text[:500] + ("..." if len(transcript_text) > 500 else ""), height=200, disabled=True)
 
+ACTION_STATUSES = ["Pending", "In progress", "Completed", "Upcoming"]
+
+def _editor_source(name, rows, columns):
+    """
+    Input frame for a data_editor. The editor keeps its own edit deltas against
+    this frame, so it stays frozen while the editor's state lives (rebuilding it
+    from the edited rows would apply the deltas twice). Streamlit drops that
+    state when the page isn't rendered, e.g. after visiting Export; the frame is
+    then rebuilt from `rows`, which already carry the edits.
+    """
+    version = st.session_state.get("processed_version", 0)
+    key = f"{name}_editor_{version}"
+    src_key = f"_editor_src_{name}"
+    cached = st.session_state.get(src_key)
+    if cached is None or cached[0] != key or key not in st.session_state:
+        cached = (key, pd.DataFrame(rows, columns=columns).fillna(""))
+        st.session_state[src_key] = cached
+    return cached[1], key
+
+def _editor_records(edited):
+    return edited.fillna("").to_dict("records")
+
+@st.fragment
+def _attendees_tab(data):
+    """Attendees as one editable table; edits rerun only this tab."""
+    st.markdown("### 👥 Attendees")
+    source, key = _editor_source(
+        "attendees",
+        [{"name": a.get("name", ""), "role": a.get("role", "")} for a in data.get("attendees", [])],
+        ["name", "role"],
+    )
+    if source.empty:
+        st.info("No attendees detected. Add rows in the table below.")
+    edited = st.data_editor(
+        source,
+        key=key,
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "name": st.column_config.TextColumn("Name"),
+            "role": st.column_config.TextColumn("Role", width="large"),
+        },
+    )
+    data["attendees"] = _editor_records(edited)
+
+@st.fragment
+def _agenda_tab(data):
+    """Agenda titles as one editable table; edits rerun only this tab."""
+    st.markdown("### 📌 Agenda (Titles only)")
+    agenda = data.get("agenda", [])
+    if not isinstance(agenda, list):
+        agenda = []
+    source, key = _editor_source(
+        "agenda",
+        [{"title": a.get("title", "") if isinstance(a, dict) else str(a)} for a in agenda],
+        ["title"],
+    )
+    if source.empty:
+        st.info("No agenda items detected. Add rows in the table below.")
+    edited = st.data_editor(
+        source,
+        key=key,
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        column_config={"title": st.column_config.TextColumn("Title", width="large")},
+    )
+    # keep minimal structure: a list of {"title"} dicts
+    data["agenda"] = [{"title": row["title"]} for row in _editor_records(edited)]
+
+@st.fragment
+def _decisions_tab(data):
+    """Decisions as one editable table; edits rerun only this tab."""
+    st.markdown("### ✅ Decisions")
+    source, key = _editor_source(
+        "decisions",
+        [{"decision": d} for d in data.get("decisions", [])],
+        ["decision"],
+    )
+    if source.empty:
+        st.info("No decisions detected. Add rows in the table below.")
+    edited = st.data_editor(
+        source,
+        key=key,
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        column_config={"decision": st.column_config.TextColumn("Decision", width="large")},
+    )
+    data["decisions"] = [row["decision"] for row in _editor_records(edited)]
+
+@st.fragment
+def _action_items_tab(data):
+    """Action items as one editable table; edits rerun only this tab."""
+    st.markdown("### 📌 Action Items")
+    source, key = _editor_source(
+        "action_items",
+        [
+            {
+                "task": a.get("task", ""),
+                "responsible": a.get("responsible", ""),
+                "deadline": a.get("deadline", ""),
+                "status": a.get("status") or "Pending",
+            }
+            for a in data.get("action_items", [])
+        ],
+        ["task", "responsible", "deadline", "status"],
+    )
+    if source.empty:
+        st.info("No action items found. Add rows in the table below.")
+    edited = st.data_editor(
+        source,
+        key=key,
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "task": st.column_config.TextColumn("Task", width="large"),
+            "responsible": st.column_config.TextColumn("Responsible"),
+            "deadline": st.column_config.TextColumn("Deadline"),
+            "status": st.column_config.SelectboxColumn(
+                "Status", options=ACTION_STATUSES, default="Pending", required=True
+            ),
+        },
+    )
+    data["action_items"] = _editor_records(edited)
+
+# (metadata key, label, default when empty), laid out down two columns
+META_FIELDS = [
+    ("title", "Title", "Meeting Summary"),
+    ("date", "Date", None),  # today's date, filled in at render time
+    ("time", "Time", ""),
+    ("venue", "Venue", ""),
+    ("organizer", "Organizer", ""),
+    ("recorder", "Recorder", ""),
+]
+
+@st.fragment
+def _metadata_section(data):
+    """Meeting information inputs, written back in one update when the form is saved."""
+    st.markdown("### 📌 Meeting Information")
+    metadata = data.setdefault('metadata', {})
+    today = datetime.now().strftime('%d/%m/%Y')
+    # exports see the same defaults the inputs show, even before the first save
+    for key, _, default in META_FIELDS:
+        if not metadata.get(key):
+            metadata[key] = today if default is None else default
+
+    with st.form("metadata_form", border=False):
+        columns = st.columns(2)
+        half = (len(META_FIELDS) + 1) // 2
+        meta_updates = {}
+        for i, (key, label, default) in enumerate(META_FIELDS):
+            with columns[i // half]:
+                meta_updates[key] = st.text_input(
+                    label,
+                    value=metadata[key],
+                    key=f"{key}_edit",
+                )
+        if st.form_submit_button("💾 Save Meeting Information"):
+            metadata.update(meta_updates)
+            st.toast("Meeting information saved")
+
+@st.fragment
+def _summary_tab(data):
+    """Summary preview and editor; edits rerun only this tab."""
+    st.markdown("### 📝 Discussion Summary")
+
+    raw_summary, paragraph_lines, bullet_points = _build_formal_summary(data.get("summary", "") or "")
+
+    st.markdown("#### 📘 Improved AI-Generated Summary Preview")
+
+    # ----------------------
+    # NEW STRUCTURED SUMMARY VIEW
+    # ----------------------
+    if raw_summary:
+        if paragraph_lines:
+            st.markdown(
+                f"<p style='text-align: justify; font-size: 16px;'>{paragraph_lines[0]}</p>",
+                unsafe_allow_html=True
+            )
+
+        if bullet_points:
+            st.markdown("#### Key Discussion Points")
+            for bp in bullet_points:
+                st.markdown(f"- {bp.lstrip('-• ').strip()}")
+
+    else:
+        st.info("No summary available yet.")
+
+    st.markdown("---")
+
+    # ----------------------
+    # TEXT AREA FOR USER TO EDIT SOURCE SUMMARY
+    # ----------------------
+    st.markdown("#### ✏️ Edit AI Summary (affects final export)")
+    updated_raw = st.text_area(
+        "Edit Summary",
+        value=raw_summary,
+        height=250,
+        key="summary_edit",
+        help="Edit this summary if needed. This will be used in the exported PDF/DOCX."
+    )
+
+    data["summary"] = updated_raw
+
+@st.fragment
+def _next_meeting_tab(data):
+    """Next-meeting details, saved together from one form."""
+    st.markdown("### 📅 Next Meeting")
+    next_meeting = data.setdefault('next_meeting', {})
+
+    # one rerun on save instead of one per keystroke
+    with st.form("next_meeting_form", border=False):
+        col1, col2 = st.columns(2)
+        with col1:
+            next_date = st.text_input("Date", value=next_meeting.get('date') or "", key="next_date")
+            next_time = st.text_input("Time", value=next_meeting.get('time') or "", key="next_time")
+        with col2:
+            next_venue = st.text_input("Venue", value=next_meeting.get('venue') or "", key="next_venue")
+            next_agenda = st.text_area("Agenda", value=next_meeting.get('agenda') or "", key="next_agenda", height=100)
+        if st.form_submit_button("💾 Save Next Meeting"):
+            next_meeting.update(date=next_date, time=next_time, venue=next_venue, agenda=next_agenda)
+            st.toast("Next meeting details saved")
+
+@st.fragment
+def _email_section(data):
+    """Email form; submitting it reruns only this section, not the whole summary page."""
+    st.markdown("### 📧 Send Minutes via Email")
+    email_subject_default = data.get("metadata", {}).get("title") or "Meeting Summary"
+    email_body_default = _build_email_body(data)
+
+    with st.form("email_form"):
+        recipients_raw = st.text_input(
+            "Recipient emails",
+            value="",
+            placeholder="alice@example.com, bob@example.com",
+        )
+        subject_input = st.text_input(
+            "Subject",
+            value=email_subject_default,
+        )
+        body_input = st.text_area(
+            "Email body",
+            value=email_body_default,
+            height=280,
+        )
+        submitted = st.form_submit_button("Send Email", type="primary")
+
+        if submitted:
+            recipients = [r.strip() for r in recipients_raw.split(",") if r.strip()]
+            if not recipients:
+                st.error("Please enter at least one recipient email.")
+            else:
+                try:
+                    with st.spinner("Sending email..."):
+                        send_summary_email(subject_input or email_subject_default, body_input, recipients)
+                    st.success("📨 Email sent successfully!")
+                except EmailConfigError as e:
+                    st.error(f"Email configuration error: {e}")
+                except Exception as e:
+                    st.error(f"Failed to send email: {e}")
+
+    st.caption("Configure SMTP_HOST/PORT/USER/PASS/SENDER in your environment before sending.")
+
 def summary_page():
     st.title("📋 Summary")
     st.markdown("---")
@@ -605,26 +1482,7 @@ def summary_page():
     
     # -------------------- MEETING METADATA --------------------
     with col1:
-        st.markdown("### 📌 Meeting Information")
-        metadata = data.get('metadata', {})
-        
-        info_col1, info_col2 = st.columns(2)
-        with info_col1:
-            title = st.text_input("Title", value=metadata.get('title') or "Meeting Summary", key="title_edit")
-            date = st.text_input("Date", value=metadata.get('date') or datetime.now().strftime('%d/%m/%Y'), key="date_edit")
-            time = st.text_input("Time", value=metadata.get('time') or "", key="time_edit")
-        
-        with info_col2:
-            venue = st.text_input("Venue", value=metadata.get('venue') or "", key="venue_edit")
-            organizer = st.text_input("Organizer", value=metadata.get('organizer') or "", key="organizer_edit")
-            recorder = st.text_input("Recorder", value=metadata.get('recorder') or "", key="recorder_edit")
-        
-        data['metadata']['title'] = title
-        data['metadata']['date'] = date
-        data['metadata']['time'] = time
-        data['metadata']['venue'] = venue
-        data['metadata']['organizer'] = organizer
-        data['metadata']['recorder'] = recorder
+        _metadata_section(data)
     
     # -------------------- STATS --------------------
     with col2:
@@ -649,221 +1507,44 @@ def summary_page():
     
     # -------------------- TAB 1: ATTENDEES --------------------
     with tab1:
-        st.markdown("### 👥 Attendees")
-        attendees = data.get('attendees', [])
-        if attendees:
-            for i, attendee in enumerate(attendees):
-                col_a, col_b = st.columns([1, 2])
-                with col_a:
-                    attendees[i]['name'] = st.text_input(
-                        f"Name {i+1}", 
-                        value=attendee.get('name', ''),
-                        key=f"attendee_name_{i}"
-                    )
-                with col_b:
-                    attendees[i]['role'] = st.text_input(
-                        f"Role {i+1}", 
-                        value=attendee.get('role', ''),
-                        key=f"attendee_role_{i}"
-                    )
-            
-            if st.button("➕ Add Attendee"):
-                attendees.append({'name': '', 'role': ''})
-                st.rerun()
-        else:
-            st.info("No attendees detected. Click below to add manually.")
-            if st.button("➕ Add Attendee"):
-                data['attendees'] = [{'name': '', 'role': ''}]
-                st.rerun()
-    
+        _attendees_tab(data)
+
     # -------------------- TAB 2: AGENDA (Simplified Title-only UI) --------------------
     with tab2:
-        st.markdown("### 📌 Agenda (Titles only)")
-
-        # Ensure agenda is a list of dicts with 'title'
-        agenda = data.get('agenda', [])
-        if not isinstance(agenda, list):
-            agenda = []
-
-        if agenda:
-            for i, item in enumerate(agenda):
-                # Show only one input: Title
-                st.markdown(f"#### Agenda Item {i+1}")
-                new_title = st.text_input(
-                    "Title",
-                    value=item.get("title", "") if isinstance(item, dict) else str(item),
-                    key=f"agenda_title_{i}"
-                )
-
-                # Update session storage: keep minimal structure
-                data['agenda'][i] = {"title": new_title}
-
-                # Delete button
-                if st.button(f"🗑 Delete Agenda Item {i+1}", key=f"delete_agenda_{i}"):
-                    data['agenda'].pop(i)
-                    st.rerun()
-
-                st.markdown("---")
-
-            if st.button("➕ Add Agenda Item"):
-                data['agenda'].append({"title": ""})
-                st.rerun()
-        else:
-            st.info("No agenda items detected.")
-            if st.button("➕ Add Agenda Item"):
-                data['agenda'] = [{"title": ""}]
-                st.rerun()
+        _agenda_tab(data)
 
     # -------------------- TAB 3: SUMMARY (IMPROVED) --------------------
     with tab3:
-        st.markdown("### 📝 Discussion Summary")
-
-        raw_summary = _sanitize(data.get("summary", ""))
-
-        st.markdown("#### 📘 Improved AI-Generated Summary Preview")
-
-        # ----------------------
-        # NEW STRUCTURED SUMMARY VIEW
-        # ----------------------
-        if raw_summary:
-            lines = [l.strip() for l in raw_summary.split("\n") if l.strip()]
-            bullet_points = [l for l in lines if l.startswith("-") or l.startswith("•")]
-            paragraph_lines = [l for l in lines if l not in bullet_points]
-
-            if paragraph_lines:
-                st.markdown(
-                    f"<p style='text-align: justify; font-size: 16px;'>{paragraph_lines[0]}</p>",
-                    unsafe_allow_html=True
-                )
-
-            if bullet_points:
-                st.markdown("#### Key Discussion Points")
-                for bp in bullet_points:
-                    st.markdown(f"- {bp.lstrip('-• ').strip()}")
-
-        else:
-            st.info("No summary available yet.")
-
-        st.markdown("---")
-
-        # ----------------------
-        # TEXT AREA FOR USER TO EDIT SOURCE SUMMARY
-        # ----------------------
-        st.markdown("#### ✏️ Edit AI Summary (affects final export)")
-        updated_raw = st.text_area(
-            "Edit Summary",
-            value=raw_summary,
-            height=250,
-            key="summary_edit",
-            help="Edit this summary if needed. This will be used in the exported PDF/DOCX."
-        )
-
-        data["summary"] = updated_raw
+        _summary_tab(data)
 
     # -------------------- TAB 4: DECISIONS --------------------
     with tab4:
-        st.markdown("### ✅ Decisions")
-        decisions = data.get('decisions', [])
-        if decisions:
-            for i, dec in enumerate(decisions):
-                data['decisions'][i] = st.text_input(
-                    f"Decision {i+1}",
-                    value=dec,
-                    key=f"decision_{i}"
-                )
-            if st.button("➕ Add Decision"):
-                decisions.append("")
-                st.rerun()
-        else:
-            st.info("No decisions detected.")
-            if st.button("➕ Add Decision"):
-                data['decisions'] = [""]
-                st.rerun()
+        _decisions_tab(data)
 
     # -------------------- TAB 5: ACTION ITEMS --------------------
     with tab5:
-        st.markdown("### 📌 Action Items")
-        action_items = data.get('action_items', [])
-        if action_items:
-            for i, action in enumerate(action_items):
-                st.markdown(f"**Action Item {i+1}**")
-                col1, col2, col3, col4 = st.columns([4, 2, 2, 1])
-                
-                with col1:
-                    action_items[i]['task'] = st.text_area("Task", value=action.get('task',''), key=f"task_{i}", height=60)
-                with col2:
-                    action_items[i]['responsible'] = st.text_input("Responsible", value=action.get('responsible',''), key=f"responsible_{i}")
-                with col3:
-                    action_items[i]['deadline'] = st.text_input("Deadline", value=action.get('deadline',''), key=f"deadline_{i}")
-                with col4:
-                    action_items[i]['status'] = st.selectbox(
-                        "Status",
-                        ["Pending","In progress","Completed","Upcoming"],
-                        index=["Pending","In progress","Completed","Upcoming"].index(action.get('status','Pending')),
-                        key=f"status_{i}"
-                    )
-                st.markdown("---")
-            
-            if st.button("➕ Add Action Item"):
-                action_items.append({'task':'','responsible':'','deadline':'','status':'Pending'})
-                st.rerun()
-
-        else:
-            st.info("No action items found.")
-            if st.button("➕ Add Action Item"):
-                data['action_items'] = [{'task':'','responsible':'','deadline':'','status':'Pending'}]
-                st.rerun()
+        _action_items_tab(data)
 
     # -------------------- TAB 6: NEXT MEETING --------------------
     with tab6:
-        st.markdown("### 📅 Next Meeting")
-        next_meeting = data.get('next_meeting', {})
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            next_meeting['date'] = st.text_input("Date", value=next_meeting.get('date') or "", key="next_date")
-            next_meeting['time'] = st.text_input("Time", value=next_meeting.get('time') or "", key="next_time")
-        with col2:
-            next_meeting['venue'] = st.text_input("Venue", value=next_meeting.get('venue') or "", key="next_venue")
-            next_meeting['agenda'] = st.text_area("Agenda", value=next_meeting.get('agenda') or "", key="next_agenda", height=100)
+        _next_meeting_tab(data)
 
     st.markdown("---")
-    st.markdown("### 📧 Send Minutes via Email")
-    email_subject_default = data.get("metadata", {}).get("title") or "Meeting Summary"
-    email_body_default = _build_email_body(data)
+    _email_section(data)
 
-    with st.form("email_form"):
-        recipients_raw = st.text_input(
-            "Recipient emails",
-            value="",
-            placeholder="alice@example.com, bob@example.com",
-        )
-        subject_input = st.text_input(
-            "Subject",
-            value=email_subject_default,
-        )
-        body_input = st.text_area(
-            "Email body",
-            value=email_body_default,
-            height=280,
-        )
-        submitted = st.form_submit_button("Send Email", type="primary")
+@st.cache_resource(show_spinner=False)
+def _get_exporter():
+    # stateless apart from the header image path; one instance per process
+    from export_utils import MeetingExporter
+    return MeetingExporter()
 
-        if submitted:
-            recipients = [r.strip() for r in recipients_raw.split(",") if r.strip()]
-            if not recipients:
-                st.error("Please enter at least one recipient email.")
-            else:
-                try:
-                    with st.spinner("Sending email..."):
-                        send_summary_email(subject_input or email_subject_default, body_input, recipients)
-                    st.success("📨 Email sent successfully!")
-                except EmailConfigError as e:
-                    st.error(f"Email configuration error: {e}")
-                except Exception as e:
-                    st.error(f"Failed to send email: {e}")
+@st.cache_data(show_spinner=False, max_entries=4)
+def _build_pdf(data_json: str) -> bytes:
+    return _get_exporter().export_to_pdf(json.loads(data_json)).getvalue()
 
-    st.caption("Configure SMTP_HOST/PORT/USER/PASS/SENDER in your environment before sending.")
+@st.cache_data(show_spinner=False, max_entries=4)
+def _build_docx(data_json: str) -> bytes:
+    return _get_exporter().export_to_docx(json.loads(data_json)).getvalue()
 
 def export_page():
     st.title("📥 Export")
@@ -879,57 +1560,46 @@ def export_page():
     st.session_state.processed_data = data
     st.markdown("## Export Options")
     
-    # Initialise buffers in session state if not present
-    if "pdf_buffer" not in st.session_state:
-        st.session_state.pdf_buffer = None
-    if "docx_buffer" not in st.session_state:
-        st.session_state.docx_buffer = None
-    
+    # Both files are rendered as soon as the page opens and cached by content,
+    # so the download buttons are ready immediately and unchanged minutes are
+    # never rendered twice.
+    data_json = json.dumps(data, sort_keys=True, default=str)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("### 📄 PDF Export")
-        if st.button("📄 Generate PDF", type="primary", use_container_width=True):
-            try:
-                exporter = MeetingExporter()
-                with st.spinner("Generating PDF..."):
-                    st.session_state.pdf_buffer = exporter.export_to_pdf(data)
-                st.success("✅ PDF generated. Use the download button below.")
-            except Exception as e:
-                st.error(f"PDF export failed: {e}")
-                st.session_state.pdf_buffer = None
-        
-        if st.session_state.pdf_buffer:
-            filename = f"Meeting_Minutes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        try:
+            with st.spinner("Generating PDF..."):
+                pdf_bytes = _build_pdf(data_json)
             st.download_button(
                 label="⬇️ Download PDF",
-                data=st.session_state.pdf_buffer,
-                file_name=filename,
+                data=pdf_bytes,
+                file_name=f"Meeting_Minutes_{stamp}.pdf",
                 mime="application/pdf",
+                type="primary",
+                on_click="ignore",
                 use_container_width=True
             )
+        except Exception as e:
+            st.error(f"PDF export failed: {e}")
     
     with col2:
         st.markdown("### 📝 DOCX Export")
-        if st.button("📝 Generate DOCX", type="primary", use_container_width=True):
-            try:
-                exporter = MeetingExporter()
-                with st.spinner("Generating DOCX..."):
-                    st.session_state.docx_buffer = exporter.export_to_docx(data)
-                st.success("✅ DOCX generated. Use the download button below.")
-            except Exception as e:
-                st.error(f"DOCX export failed: {e}")
-                st.session_state.docx_buffer = None
-            
-        if st.session_state.docx_buffer:
-            filename = f"Meeting_Minutes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx"
+        try:
+            with st.spinner("Generating DOCX..."):
+                docx_bytes = _build_docx(data_json)
             st.download_button(
                 label="⬇️ Download DOCX",
-                data=st.session_state.docx_buffer,
-                file_name=filename,
+                data=docx_bytes,
+                file_name=f"Meeting_Minutes_{stamp}.docx",
                 mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                type="primary",
+                on_click="ignore",
                 use_container_width=True
             )
+        except Exception as e:
+            st.error(f"DOCX export failed: {e}")
 
 if __name__ == "__main__":
     main()
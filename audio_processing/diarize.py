@@ -1,10 +1,19 @@
-import json
-from pathlib import Path
+import bisect
+import os
+import re
+import threading
+from collections import defaultdict
 
-def _save_json(obj, path):
-    Path(path).parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as fh:
-        json.dump(obj, fh, ensure_ascii=False, indent=2)
+from audio_processing.jsonio import save_json
+
+# pyannote 3.x pipeline: faster and more accurate than the 2.x "speaker-diarization"
+DIARIZATION_MODEL = "pyannote/speaker-diarization-3.1"
+
+# heuristic fallback in diarize_audio: speaker names written into the text
+_SPEAKER_COLON_RE = re.compile(r"^([A-Z][A-Za-z\.\- ]{1,30}):\s+(.*)$")       # "Name: content"
+_BRACKET_RE = re.compile(r'\[(?:Speaker\s+)?([A-Z][A-Za-z\.\- ]{1,30}|Speaker\s+\d+)\]')  # "[Name]"
+_NAME_RE = re.compile(r'^[A-Z][A-Za-z\.\- ]+$')
+_WS_RE = re.compile(r'\s+')
 
 def _cluster_segments_by_voice(audio_path, transcript_segments, max_speakers=4):
     """
@@ -21,10 +30,26 @@ def _cluster_segments_by_voice(audio_path, transcript_segments, max_speakers=4):
         return None
 
     try:
-        signal, sr = librosa.load(audio_path, sr=None, mono=True)
+        if isinstance(audio_path, dict):
+            signal = np.asarray(audio_path["waveform"], dtype=np.float32)
+            if signal.ndim > 1:
+                signal = signal.mean(axis=0)
+            sr = int(audio_path["sample_rate"])
+        else:
+            signal, sr = librosa.load(audio_path, sr=None, mono=True)
     except Exception:
         return None
 
+    # MFCCs and deltas over the whole recording in one STFT pass; each segment
+    # then only slices its frame columns instead of re-running librosa per snippet
+    hop = 512
+    try:
+        mfcc_all = librosa.feature.mfcc(y=signal, sr=sr, n_mfcc=20, hop_length=hop)
+        delta_all = librosa.feature.delta(mfcc_all)
+    except Exception:
+        return None
+    n_frames = mfcc_all.shape[1]
+
     features = []
     segment_indices = []
     for idx, seg in enumerate(transcript_segments):
@@ -36,11 +61,13 @@ def _cluster_segments_by_voice(audio_path, transcript_segments, max_speakers=4):
         end_idx = int(end * sr)
         if end_idx - start_idx < int(0.2 * sr):
             continue
-        snippet = signal[start_idx:end_idx]
-        if not np.any(snippet):
+        if not np.any(signal[start_idx:end_idx]):
             continue
-        mfcc = librosa.feature.mfcc(y=snippet, sr=sr, n_mfcc=20)
-        delta = librosa.feature.delta(mfcc)
+        # frame t is centred on sample t * hop
+        f0 = min(start_idx // hop, n_frames - 1)
+        f1 = min(end_idx // hop + 1, n_frames)
+        mfcc = mfcc_all[:, f0:f1]
+        delta = delta_all[:, f0:f1]
         feat = np.concatenate(
             [
                 mfcc.mean(axis=1),
@@ -117,35 +144,276 @@ def _cluster_segments_by_voice(audio_path, transcript_segments, max_speakers=4):
     return defaults
 
 
-def diarize_audio(audio_path, transcript_segments, out_json=None, use_pyannote=True):
+def single_speaker_segments(transcript_segments, speaker="Speaker 1"):
+    """
+    Speech segments with one speaker label, for when speaker identity isn't needed.
+    The transcript segments already follow VAD speech boundaries, so no audio is read.
+    """
+    return [
+        {
+            "speaker": speaker,
+            "start": seg.get("start"),
+            "end": seg.get("end"),
+            "text": (seg.get("text") or "").strip(),
+        }
+        for seg in transcript_segments
+        if (seg.get("text") or "").strip()
+    ]
+
+
+def needs_diarization(transcript_segments, min_speech_s=20.0, min_gap_s=2.0):
+    """
+    Cheap check on segment timings: recordings with under `min_speech_s` of speech,
+    or with no pause longer than `min_gap_s` between segments (one person talking
+    continuously), are treated as single-speaker and not worth diarizing.
+    """
+    speech = 0.0
+    longest_gap = 0.0
+    prev_end = None
+    for seg in transcript_segments:
+        start = seg.get("start")
+        end = seg.get("end")
+        if start is None or end is None:
+            continue
+        speech += max(0.0, float(end) - float(start))
+        if prev_end is not None:
+            longest_gap = max(longest_gap, float(start) - prev_end)
+        prev_end = float(end)
+    return speech >= min_speech_s and longest_gap > min_gap_s
+
+
+def load_diarization_pipeline(model_name=DIARIZATION_MODEL):
+    """
+    Load a pyannote diarization pipeline, on the GPU when one is available.
+    The Hugging Face token is read from HF_TOKEN (or HUGGINGFACE_TOKEN); without
+    one the token saved by `huggingface-cli login` is used.
+    Returns None if pyannote is not installed or the model can't be fetched.
+    """
+    token = os.environ.get("HF_TOKEN") or os.environ.get("HUGGINGFACE_TOKEN")
+    try:
+        from pyannote.audio import Pipeline
+        if not token:
+            pipeline = Pipeline.from_pretrained(model_name)
+        else:
+            try:
+                pipeline = Pipeline.from_pretrained(model_name, use_auth_token=token)
+            except TypeError:
+                # pyannote.audio 4 renamed the argument
+                pipeline = Pipeline.from_pretrained(model_name, token=token)
+    except Exception:
+        return None
+    if pipeline is None:
+        return None
+    try:
+        import torch
+        if torch.cuda.is_available():
+            pipeline.to(torch.device("cuda"))
+    except Exception:
+        pass
+    return pipeline
+
+
+# process-wide pipelines for callers that don't manage their own (see diarize_turns)
+_PIPELINES = {}
+_PIPELINE_LOCK = threading.Lock()
+
+
+def get_diarization_pipeline(model_name=DIARIZATION_MODEL):
+    """
+    Shared pyannote pipeline per model, loaded once per process. The lock keeps
+    concurrent first calls from loading the weights twice. A failed load (None)
+    is not cached, so it is retried on the next call.
+    """
+    pipeline = _PIPELINES.get(model_name)
+    if pipeline is None:
+        with _PIPELINE_LOCK:
+            pipeline = _PIPELINES.get(model_name)
+            if pipeline is None:
+                pipeline = load_diarization_pipeline(model_name)
+                if pipeline is not None:
+                    _PIPELINES[model_name] = pipeline
+    return pipeline
+
+
+def clear_pipeline_cache():
+    """Drop the shared pipelines (frees their GPU/CPU memory once unreferenced)."""
+    with _PIPELINE_LOCK:
+        _PIPELINES.clear()
+
+
+def _waveform_input(audio):
+    """
+    In-memory {"waveform", "sample_rate"} input for pyannote, so it doesn't reopen
+    and resample the file for every chunk it crops. Dicts may hold a numpy signal
+    or a tensor; if the file can't be decoded here the path is returned unchanged.
+    """
+    try:
+        import torch
+        if isinstance(audio, dict):
+            waveform, sr = audio["waveform"], audio["sample_rate"]
+        else:
+            from audio_processing.vad import SAMPLE_RATE, load_audio
+            waveform, sr = load_audio(str(audio), sr=SAMPLE_RATE), SAMPLE_RATE
+        if not torch.is_tensor(waveform):
+            waveform = torch.from_numpy(waveform)
+    except Exception:
+        return audio
+    if waveform.dim() == 1:
+        waveform = waveform.unsqueeze(0)
+    return {"waveform": waveform, "sample_rate": sr}
+
+
+def _autocast_fp16():
+    """fp16 autocast context on CUDA; a no-op context on CPU/MPS or without torch."""
+    from contextlib import nullcontext
+    try:
+        import torch
+        if torch.cuda.is_available():
+            return torch.autocast("cuda", dtype=torch.float16)
+    except Exception:
+        pass
+    return nullcontext()
+
+
+def diarize_turns(audio_path, pipeline=None, mixed_precision=False):
+    """
+    Run only the pyannote pass and return its speaker turns as
+    [{'start','end','speaker'}]. It needs no transcript, so it can run
+    alongside transcription; feed the result to diarize_audio(turns=...).
+    Raises if no pipeline is available.
+    """
+    pipeline = pipeline or get_diarization_pipeline()
+    if pipeline is None:
+        raise RuntimeError("pyannote pipeline unavailable")
+    audio = _waveform_input(audio_path)
+    if mixed_precision:
+        # segmentation/embedding forward passes in fp16 on tensor cores
+        with _autocast_fp16():
+            diarization = pipeline(audio)
+    else:
+        diarization = pipeline(audio)
+    return [
+        {"start": float(turn.start), "end": float(turn.end), "speaker": speaker}
+        for turn, _, speaker in diarization.itertracks(yield_label=True)
+    ]
+
+
+class _TurnIndex:
+    """
+    Speaker turns sorted by start, for interval lookups by binary search. Built
+    once per meeting and queried for every transcript segment; pyannote turns
+    may overlap, so a query can return several turns.
+    """
+
+    def __init__(self, turns):
+        self.turns = sorted(turns, key=lambda t: t["start"])
+        self.starts = [t["start"] for t in self.turns]
+        # running max of turn ends: the first index where it reaches `t` is the
+        # earliest turn that can still be active at `t`
+        self.reach = []
+        furthest = float("-inf")
+        for turn in self.turns:
+            furthest = max(furthest, turn["end"])
+            self.reach.append(furthest)
+
+    def covering(self, t):
+        """Turns with start <= t <= end, in start order."""
+        last = bisect.bisect_right(self.starts, t)  # turns [0, last) start at or before t
+        first = bisect.bisect_left(self.reach, t)
+        return [turn for turn in self.turns[first:last] if turn["end"] >= t]
+
+    def overlapping(self, start, end):
+        """Turns sharing some time with (start, end), in start order."""
+        last = bisect.bisect_left(self.starts, end)  # turns [0, last) start before `end`
+        first = bisect.bisect_right(self.reach, start)
+        return [turn for turn in self.turns[first:last] if turn["end"] > start]
+
+
+def _speaker_by_overlap(candidates, start, end):
+    """
+    Speaker with the most total time inside [start, end] across `candidates`.
+    On a tie, the speaker owning the turn whose midpoint is closest to the
+    segment's midpoint wins.
+    """
+    overlap = defaultdict(float)
+    nearest = {}
+    mid = (start + end) / 2.0
+    for t in candidates:
+        overlap[t["speaker"]] += max(0.0, min(t["end"], end) - max(t["start"], start))
+        dist = abs((t["start"] + t["end"]) / 2.0 - mid)
+        nearest[t["speaker"]] = min(dist, nearest.get(t["speaker"], dist))
+    return max(overlap, key=lambda sp: (overlap[sp], -nearest[sp]))
+
+
+def _segment_speaker(index, seg, default):
+    start, end = seg["start"], seg["end"]
+    if end > start:
+        candidates = index.overlapping(start, end)
+    else:
+        # zero-length segment: whichever turn contains it
+        candidates = index.covering(start)
+    return _speaker_by_overlap(candidates, start, end) if candidates else default
+
+
+def _speakers_by_overlap(turns, transcript_segments, default="Speaker 1"):
+    """
+    Speaker for each transcript segment by maximum overlap: per speaker, the total
+    time their turns share with the segment, so a segment where the speaker
+    changes mid-sentence goes to whoever said most of it. Turns are indexed once,
+    so this is O((N + M) log M + K) for K segment/turn overlaps; with numpy the
+    binary searches run for all segments at once and only segments touching more
+    than one turn are scored in Python.
+    """
+    index = _TurnIndex(turns)
+    if not index.turns:
+        return [default] * len(transcript_segments)
+    try:
+        import numpy as np
+    except ImportError:
+        return [_segment_speaker(index, seg, default) for seg in transcript_segments]
+
+    n = len(transcript_segments)
+    seg_starts = np.fromiter((seg["start"] for seg in transcript_segments), dtype=float, count=n)
+    seg_ends = np.fromiter((seg["end"] for seg in transcript_segments), dtype=float, count=n)
+    # turns [first, last) are the only ones that can overlap each segment, and
+    # turns[first] always does when the range is non-empty
+    first = np.searchsorted(np.asarray(index.reach), seg_starts, side="right")
+    last = np.searchsorted(np.asarray(index.starts), seg_ends, side="left")
+    labels = np.array([t["speaker"] for t in index.turns] + [default], dtype=object)
+    # exactly one candidate (the common case) -> that turn; none -> default
+    speakers = np.where(last - first >= 1, labels[np.minimum(first, len(index.turns))], default)
+    # several turns, or a zero-length segment: score in Python
+    for i in np.flatnonzero((last - first > 1) | (seg_ends <= seg_starts)).tolist():
+        speakers[i] = _segment_speaker(index, transcript_segments[i], default)
+    return speakers.tolist()
+
+
+def diarize_audio(audio_path, transcript_segments, out_json=None, use_pyannote=True, pipeline=None,
+                  mixed_precision=False, turns=None):
     """
     Attempt speaker diarization and align with transcript_segments.
-    Returns list of segments with 'speaker','start','end','text'.
+    `pipeline` is a preloaded pyannote pipeline (see load_diarization_pipeline);
+    without one the process-wide get_diarization_pipeline() instance is used. `audio_path` may also be a pyannote
+    {"waveform": (channel, time) tensor or 1-D signal, "sample_rate": int} dict.
+    `mixed_precision` runs the pyannote pass under fp16 autocast on CUDA (fp32 elsewhere).
+    `turns` are precomputed pyannote turns from diarize_turns; only alignment runs then.
+    Returns list of segments with 'speaker','start','end','text'; 'speaker' and
+    'text' are always present strings, so callers can index them directly.
     Fallback: single speaker for all segments.
     """
     diarized = []
     try:
         if use_pyannote:
-            from pyannote.audio import Pipeline
-            pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization")
-            diarization = pipeline(audio_path)
-            # convert to list of (start,end, speaker_label)
-            turns = []
-            for turn, _, speaker in diarization.itertracks(yield_label=True):
-                turns.append({"start": float(turn.start), "end": float(turn.end), "speaker": speaker})
-            # naive alignment: assign each transcript segment to the speaker whose turn overlaps midpoint
-            for seg in transcript_segments:
-                mid = (seg["start"] + seg["end"]) / 2.0
-                sp = "Speaker 1"
-                for t in turns:
-                    if t["start"] <= mid <= t["end"]:
-                        sp = t["speaker"]
-                        break
+            if turns is None:
+                turns = diarize_turns(audio_path, pipeline, mixed_precision=mixed_precision)
+            # assign each transcript segment to the speaker who talks most during it
+            speakers = _speakers_by_overlap(turns, transcript_segments)
+            for seg, sp in zip(transcript_segments, speakers):
                 diarized.append({
                     "speaker": sp,
                     "start": seg["start"],
                     "end": seg["end"],
-                    "text": seg["text"]
+                    "text": seg.get("text") or ""
                 })
         else:
             raise Exception("pyannote disabled")
@@ -154,7 +422,6 @@ def diarize_audio(audio_path, transcript_segments, out_json=None, use_pyannote=T
         # 1) If segment text starts with "Name: ...", use that as speaker and strip prefix
         # 2) Extract speaker names from transcript patterns
         # 3) Track unique speakers and assign them properly
-        import re
         cluster_defaults = _cluster_segments_by_voice(audio_path, transcript_segments)
         alias = {}
         speakers_seen = {}  # Map speaker name to speaker label
@@ -170,12 +437,12 @@ def diarize_audio(audio_path, transcript_segments, out_json=None, use_pyannote=T
                 sp = alias.get(default_label, default_label)
             
             # Pattern 1: "Name: content" at start of text
-            m = re.match(r"^([A-Z][A-Za-z\.\- ]{1,30}):\s+(.*)$", txt)
+            m = _SPEAKER_COLON_RE.match(txt)
             if m:
                 sp_name = m.group(1).strip()
                 txt = m.group(2).strip()
                 # Normalize speaker name (remove common prefixes/suffixes)
-                sp_name = re.sub(r'\s+', ' ', sp_name)
+                sp_name = _WS_RE.sub(' ', sp_name)
                 if sp_name not in speakers_seen:
                     speakers_seen[sp_name] = sp_name
                     speaker_counter += 1
@@ -184,10 +451,10 @@ def diarize_audio(audio_path, transcript_segments, out_json=None, use_pyannote=T
                     alias[default_label] = sp
             else:
                 # Pattern 2: Look for speaker labels in brackets like [Speaker 1] or [Name]
-                bracket_match = re.search(r'\[(?:Speaker\s+)?([A-Z][A-Za-z\.\- ]{1,30}|Speaker\s+\d+)\]', txt)
+                bracket_match = _BRACKET_RE.search(txt)
                 if bracket_match:
                     sp_name = bracket_match.group(1).strip()
-                    txt = re.sub(r'\[(?:Speaker\s+)?[A-Z][A-Za-z\.\- ]{1,30}|Speaker\s+\d+\]', '', txt).strip()
+                    txt = _BRACKET_RE.sub('', txt).strip()
                     if sp_name not in speakers_seen:
                         speakers_seen[sp_name] = sp_name
                         speaker_counter += 1
@@ -198,7 +465,7 @@ def diarize_audio(audio_path, transcript_segments, out_json=None, use_pyannote=T
                 elif ':' in txt:
                     colon_parts = txt.split(':', 1)
                     potential_name = colon_parts[0].strip()
-                    if len(potential_name) > 2 and len(potential_name) < 40 and re.match(r'^[A-Z][A-Za-z\.\- ]+$', potential_name):
+                    if len(potential_name) > 2 and len(potential_name) < 40 and _NAME_RE.match(potential_name):
                         sp_name = potential_name
                         txt = colon_parts[1].strip() if len(colon_parts) > 1 else txt
                         if sp_name not in speakers_seen:
@@ -226,5 +493,5 @@ def diarize_audio(audio_path, transcript_segments, out_json=None, use_pyannote=T
             last_speaker = sp
 
     if out_json:
-        _save_json(diarized, out_json)
+        save_json(diarized, out_json)
     return diarized
\ No newline at end of file
@@ -0,0 +1,66 @@
+"""
+JSON writing for transcript/diarization dumps. Uses orjson when installed
+(much faster on long segment lists, and serializes numpy values directly),
+otherwise the stdlib json module with the same output shape.
+"""
+import json
+from pathlib import Path
+
+try:
+    import orjson
+    HAVE_ORJSON = True
+except Exception:
+    HAVE_ORJSON = False
+
+
+_ORJSON_OPTS = (orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY) if HAVE_ORJSON else 0
+_WRITE_BUFFER = 1 << 20
+
+
+def _orjson_chunks(obj, pad=b"", depth=2):
+    """
+    Yield the orjson OPT_INDENT_2 encoding of `obj` piece by piece: the outer
+    `depth` levels of lists/dicts are walked here and only their items are
+    encoded at once, so a long segment list is never held as one bytes object.
+    """
+    if depth > 0 and isinstance(obj, (list, tuple)) and obj:
+        inner = pad + b"  "
+        yield b"["
+        for i, item in enumerate(obj):
+            yield (b",\n" if i else b"\n") + inner
+            yield from _orjson_chunks(item, inner, depth - 1)
+        yield b"\n" + pad + b"]"
+    elif depth > 0 and isinstance(obj, dict) and obj:
+        inner = pad + b"  "
+        yield b"{"
+        for i, (key, value) in enumerate(obj.items()):
+            yield (b",\n" if i else b"\n") + inner + orjson.dumps(key) + b": "
+            yield from _orjson_chunks(value, inner, depth - 1)
+        yield b"\n" + pad + b"}"
+    else:
+        yield orjson.dumps(obj, option=_ORJSON_OPTS).replace(b"\n", b"\n" + pad)
+
+
+def save_json(obj, path):
+    """
+    Write `obj` to `path` as indented UTF-8 JSON, creating parent dirs. The
+    output is streamed through a 1 MiB buffer rather than built in memory first.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if HAVE_ORJSON:
+        with open(path, "wb", buffering=_WRITE_BUFFER) as fh:
+            for chunk in _orjson_chunks(obj):
+                fh.write(chunk)
+        return
+    # json.dump already encodes incrementally (iterencode) into the file
+    with open(path, "w", encoding="utf-8", buffering=_WRITE_BUFFER) as fh:
+        json.dump(obj, fh, ensure_ascii=False, indent=2)
+
+
+def load_json(path):
+    """Read a JSON file written by save_json."""
+    if HAVE_ORJSON:
+        return orjson.loads(Path(path).read_bytes())
+    with open(path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
@@ -1,61 +1,296 @@
-import json
 import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import tempfile
 
-def _save_json(obj, path):
-    Path(path).parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as fh:
-        json.dump(obj, fh, ensure_ascii=False, indent=2)
+from audio_processing.jsonio import save_json
+from audio_processing.vad import SAMPLE_RATE, fixed_chunks, load_audio, vad_chunks
 
-def transcribe_with_whisper(file_path, model_name="small", language=None, out_json=None):
+def load_hf_whisper(model_name="small"):
     """
-    Try whisperx/whisper. Returns dict with 'text' and 'segments' (start,end,text).
-    Saves JSON if out_json provided.
+    Load a HuggingFace Whisper model + processor for batched decoding.
+    Returns (processor, model) or None if transformers/torch are unavailable.
     """
     try:
-        import whisperx
-        # whisperx provides improved alignment + diarization hooks
-        model = whisperx.load_model(model_name, device="cpu")
-        result = model.transcribe(file_path, language=language)
-        # result has "segments"
-        transcript = {
-            "text": result.get("text", ""),
-            "segments": [
-                {"start": s["start"], "end": s["end"], "text": s["text"]} for s in result.get("segments", [])
-            ]
-        }
+        import torch
+        from transformers import WhisperForConditionalGeneration, WhisperProcessor
+    except Exception:
+        return None
+    model_id = model_name if "/" in model_name else f"openai/whisper-{model_name}"
+    use_cuda = torch.cuda.is_available()
+    processor = WhisperProcessor.from_pretrained(model_id)
+    model = WhisperForConditionalGeneration.from_pretrained(
+        model_id,
+        use_cache=True,
+        torch_dtype=torch.float16 if use_cuda else torch.float32,
+    )
+    if use_cuda:
+        model = model.to("cuda")
+    model.eval()
+    return processor, model
+
+def _ct2_device():
+    """'cuda' when CTranslate2 sees a GPU, else 'cpu'."""
+    try:
+        import ctranslate2
+        return "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
     except Exception:
+        return "cpu"
+
+def _resolve_ct2(device, compute_type):
+    device = device or _ct2_device()
+    if compute_type is None:
+        compute_type = "int8_float16" if device == "cuda" else "int8"
+    return device, compute_type
+
+def load_faster_whisper(model_name="small", device="cpu", compute_type="int8"):
+    """
+    Load a faster-whisper (CTranslate2) model. int8 weights by default; use
+    compute_type="float16" or "int8_float16" with device="cuda".
+    device=None picks the GPU when there is one, and compute_type=None then
+    means int8_float16 on the GPU and int8 on the CPU.
+    Returns None if faster-whisper is not installed.
+    """
+    try:
+        from faster_whisper import WhisperModel
+    except Exception:
+        return None
+    device, compute_type = _resolve_ct2(device, compute_type)
+    return WhisperModel(
+        model_name,
+        device=device,
+        compute_type=compute_type,
+        cpu_threads=max(1, (os.cpu_count() or 2) // 2),
+    )
+
+# faster-whisper models loaded by transcribe_with_whisper itself, per
+# (model, device, compute type); callers with their own cache pass fast_model
+_FAST_MODELS = {}
+_FAST_MODEL_LOCK = threading.Lock()
+
+def get_faster_whisper(model_name="small", device=None, compute_type=None):
+    """
+    Shared faster-whisper model, loaded once per process and key (see
+    load_faster_whisper for the defaults). None is not cached.
+    """
+    key = (model_name,) + _resolve_ct2(device, compute_type)
+    model = _FAST_MODELS.get(key)
+    if model is None:
+        with _FAST_MODEL_LOCK:
+            model = _FAST_MODELS.get(key)
+            if model is None:
+                model = load_faster_whisper(model_name, device=key[1], compute_type=key[2])
+                if model is not None:
+                    _FAST_MODELS[key] = model
+    return model
+
+def clear_model_cache():
+    """Drop the shared faster-whisper models."""
+    with _FAST_MODEL_LOCK:
+        _FAST_MODELS.clear()
+
+def _transcribe_faster(file_path, model, language=None, on_progress=None, batch_size=1):
+    """
+    Greedy decode with faster-whisper's built-in Silero VAD filter.
+    With batch_size > 1 the VAD chunks are decoded together through
+    BatchedInferencePipeline (faster-whisper >= 1.1); older versions decode sequentially.
+    """
+    pipe = None
+    if batch_size > 1:
+        try:
+            from faster_whisper import BatchedInferencePipeline
+            pipe = BatchedInferencePipeline(model=model)
+        except ImportError:
+            pipe = None
+    if pipe is not None:
+        segments, info = pipe.transcribe(
+            file_path, language=language, beam_size=1, vad_filter=True, batch_size=batch_size
+        )
+    else:
+        segments, info = model.transcribe(
+            file_path, language=language, beam_size=1, vad_filter=True
+        )
+    total = float(getattr(info, "duration", 0.0) or 0.0)
+    # `segments` is a generator; decoding happens while iterating
+    out = []
+    for s in segments:
+        if s.text and s.text.strip():
+            out.append({"start": float(s.start), "end": float(s.end), "text": s.text.strip()})
+        if on_progress:
+            on_progress(float(s.end), total)
+    return {
+        "text": " ".join(s["text"] for s in out),
+        "segments": out,
+    }
+
+def _transcribe_batched(file_path, model, language=None, batch_size=8, vad="webrtc",
+                        on_progress=None, audio=None):
+    """
+    Split audio into <=30 s speech chunks and decode them in batches of `batch_size`
+    with one generate() call per batch. Segment timestamps are shifted back by
+    each chunk's start offset so the result matches the sequential output shape.
+    Log-mel features for the next batch are computed on a helper thread while
+    the current batch decodes; `on_progress(done_s, total_s)` fires per batch.
+    `audio` is an already decoded 16 kHz mono signal; the file is only read without it.
+    """
+    import torch
+
+    processor, hf_model = model
+    signal = audio if audio is not None else load_audio(file_path, sr=SAMPLE_RATE)
+    duration = len(signal) / float(SAMPLE_RATE)
+    spans = vad_chunks(signal, sr=SAMPLE_RATE) if vad == "webrtc" else fixed_chunks(duration)
+
+    gen_kwargs = {"return_timestamps": True, "task": "transcribe", "use_cache": True}
+    if language:
+        gen_kwargs["language"] = language
+
+    def _features(batch):
+        audio = [signal[int(s * SAMPLE_RATE):int(e * SAMPLE_RATE)] for s, e in batch]
+        # pads every chunk to 30 s -> input_features of shape (B, 80, 3000)
+        return processor(audio, sampling_rate=SAMPLE_RATE, return_tensors="pt").input_features
+
+    batches = [spans[b:b + batch_size] for b in range(0, len(spans), batch_size)]
+    segments = []
+    with ThreadPoolExecutor(max_workers=1) as prep:
+        pending = prep.submit(_features, batches[0]) if batches else None
+        for k, batch in enumerate(batches):
+            features = pending.result()
+            if k + 1 < len(batches):
+                pending = prep.submit(_features, batches[k + 1])
+            features = features.to(hf_model.device, dtype=hf_model.dtype)
+            with torch.inference_mode():
+                ids = hf_model.generate(features, **gen_kwargs)
+            decoded = processor.batch_decode(ids, skip_special_tokens=True, output_offsets=True)
+            for (offset, chunk_end), item in zip(batch, decoded):
+                pieces = item.get("offsets") or []
+                if not pieces and item.get("text", "").strip():
+                    pieces = [{"text": item["text"], "timestamp": (0.0, chunk_end - offset)}]
+                for piece in pieces:
+                    text = (piece.get("text") or "").strip()
+                    if not text:
+                        continue
+                    start, end = piece.get("timestamp") or (0.0, None)
+                    start = offset + (start or 0.0)
+                    end = offset + end if end is not None else chunk_end
+                    segments.append({"start": round(start, 2), "end": round(end, 2), "text": text})
+            if on_progress:
+                on_progress(batch[-1][1], duration)
+
+    return {
+        "text": " ".join(s["text"] for s in segments),
+        "segments": segments,
+    }
+
+def transcribe_with_whisper(file_path, model_name="small", language=None, out_json=None,
+                            batch_size=1, vad=None, model=None, fast_model=None,
+                            on_progress=None, audio=None):
+    """
+    Try faster-whisper, then whisperx/whisper. Returns dict with 'text' and
+    'segments' (start,end,text).
+    `fast_model` is a preloaded faster-whisper model, used first and batched over
+    VAD chunks when batch_size > 1. Without one (and without a HF `model`), a
+    shared faster-whisper model is used (loaded once per process, see
+    get_faster_whisper): int8 on CPU, int8_float16 on GPU.
+    When batch_size > 1 and a HF Whisper `model` (processor, model) is available,
+    VAD chunks are decoded in parallel batches next.
+    `on_progress(done_s, total_s)` is called as audio windows finish (first two tiers).
+    `audio` is an optional preloaded 16 kHz mono float32 signal (see vad.load_audio);
+    every backend accepts it in place of the path, so the file isn't decoded again.
+    Saves JSON if out_json provided.
+    """
+    source = audio if audio is not None else file_path
+    transcript = None
+    if fast_model is None and model is None:
+        # CTranslate2 int8 beats the FP32 PyTorch tiers below by a wide margin
+        try:
+            fast_model = get_faster_whisper(model_name)
+        except Exception:
+            fast_model = None
+    if fast_model is not None:
+        try:
+            transcript = _transcribe_faster(
+                source, fast_model, language=language, on_progress=on_progress,
+                batch_size=batch_size,
+            )
+        except Exception:
+            transcript = None
+
+    if transcript is None and batch_size > 1:
+        try:
+            model = model or load_hf_whisper(model_name)
+            if model:
+                transcript = _transcribe_batched(
+                    file_path, model, language=language, batch_size=batch_size, vad=vad,
+                    on_progress=on_progress, audio=audio,
+                )
+        except Exception:
+            transcript = None
+
+    if transcript is None:
         try:
-            import whisper
-            model = whisper.load_model(model_name)
-            result = model.transcribe(file_path, language=language)
+            import whisperx
+            # whisperx provides improved alignment + diarization hooks
+            model = whisperx.load_model(model_name, device="cpu")
+            result = model.transcribe(source, language=language)
+            # result has "segments"
             transcript = {
                 "text": result.get("text", ""),
                 "segments": [
                     {"start": s["start"], "end": s["end"], "text": s["text"]} for s in result.get("segments", [])
                 ]
             }
-        except Exception as e:
-            transcript = {"text": "", "segments": []}
-            transcript["error"] = str(e)
+        except Exception:
+            try:
+                import whisper
+                model = whisper.load_model(model_name)
+                result = model.transcribe(source, language=language)
+                transcript = {
+                    "text": result.get("text", ""),
+                    "segments": [
+                        {"start": s["start"], "end": s["end"], "text": s["text"]} for s in result.get("segments", [])
+                    ]
+                }
+            except Exception as e:
+                transcript = {"text": "", "segments": []}
+                transcript["error"] = str(e)
 
     if out_json:
-        _save_json(transcript, out_json)
+        save_json(transcript, out_json)
     return transcript
 
-def transcribe_audio(uploaded_file, tmp_dir=None, model_name="small", language=None):
+def save_upload(uploaded_file, tmp_dir=None):
     """
-    Save uploaded_file (Streamlit UploadedFile) to temp path and transcribe.
-    Returns (audio_path, transcript_dict, json_path)
+    Write uploaded_file (Streamlit UploadedFile or any binary file object) into
+    tmp_dir in 1 MiB blocks; returns the file path.
     """
     tmp_dir = tmp_dir or tempfile.gettempdir()
     Path(tmp_dir).mkdir(parents=True, exist_ok=True)
     suffix = Path(uploaded_file.name).suffix or ".wav"
     tmp_path = os.path.join(tmp_dir, f"meeting_audio{suffix}")
+    if hasattr(uploaded_file, "seek"):
+        uploaded_file.seek(0)
     with open(tmp_path, "wb") as fh:
-        fh.write(uploaded_file.getbuffer())
+        if hasattr(os, "posix_fadvise"):
+            # written once front to back and then decoded in order
+            os.posix_fadvise(fh.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        shutil.copyfileobj(uploaded_file, fh, length=1024 * 1024)
+    return tmp_path
+
+def transcribe_audio(uploaded_file, tmp_dir=None, model_name="small", language=None,
+                     batch_size=1, vad=None, model=None, fast_model=None, on_progress=None):
+    """
+    Save uploaded_file (Streamlit UploadedFile) to temp path and transcribe.
+    Returns (audio_path, transcript_dict, json_path)
+    """
+    tmp_dir = tmp_dir or tempfile.gettempdir()
+    tmp_path = save_upload(uploaded_file, tmp_dir)
 
     json_path = os.path.join(tmp_dir, Path(uploaded_file.name).stem + "_transcript.json")
-    transcript = transcribe_with_whisper(tmp_path, model_name=model_name, language=language, out_json=json_path)
-    return tmp_path, transcript, json_path
\ No newline at end of file
+    transcript = transcribe_with_whisper(
+        tmp_path, model_name=model_name, language=language, out_json=json_path,
+        batch_size=batch_size, vad=vad, model=model, fast_model=fast_model,
+        on_progress=on_progress,
+    )
+    return tmp_path, transcript, json_path
@@ -3,8 +3,73 @@ Parse transcripts with timestamps and speaker names into structured format.
 Handles various formats from Zoom, Whisper AI, and other transcription services.
 """
 import re
+import sys
 from typing import List, Dict
 
+# google-re2 (optional): linear-time DFA matching, so a long or malformed line
+# can't trigger catastrophic backtracking. Flags are written inline so every
+# pattern compiles unchanged under both engines.
+try:
+    import re2
+    HAVE_RE2 = True
+except ImportError:
+    re2 = None
+    HAVE_RE2 = False
+
+
+def _compile(pattern: str):
+    if HAVE_RE2:
+        try:
+            return re2.compile(pattern)
+        except Exception:
+            pass
+    return re.compile(pattern)
+
+
+# Compiled once at import. Matching stays line-by-line: the speaker class
+# [A-Za-z.\-\s] contains \s, so a whole-buffer finditer would let a speaker
+# name run across newlines.
+
+# Pattern 1: [HH:MM:SS] or [MM:SS] or [H:MM:SS] Speaker Name: text
+_TIMESTAMPED_LINE = _compile(
+    r'\[?(\d{1,2}):(\d{2})(?::(\d{2}))?\]?\s*'  # timestamp [H]H:MM[:SS]
+    r'([A-Z][A-Za-z\.\-\s]{1,40}?)[:\-]\s*'      # speaker name followed by : or -
+    r'(.*)$'                                      # text
+)
+
+# Pattern 2: Speaker Name: text (no timestamp)
+_SPEAKER_LINE = _compile(
+    r'^([A-Z][A-Za-z\.\-\s]{1,40}?)[:\-]\s*'     # speaker name
+    r'(.*)$'                                      # text
+)
+
+# Fallback: Name: text
+_COLON_LINE = _compile(r'^([A-Z][A-Za-z\.\-\s]{2,40}?)[:\-]\s+(.+)$')
+
+_WS = _compile(r'\s+')
+_DIGITS = _compile(r'^\d+$')
+_GENERIC_SPEAKER = _compile(r'(?i)^Speaker\s+\d+$')
+_PROPER_NAME = _compile(r'^[A-Z][A-Za-z\.\-\s]+$')
+
+_TIMESTAMP_PATTERNS = (
+    _compile(r'\[\d{1,2}:\d{2}(?::\d{2})?\]'),          # [HH:MM:SS] or [MM:SS]
+    _compile(r'(?m)^\d{1,2}:\d{2}(?::\d{2})?\s+'),      # HH:MM:SS at start of line
+)
+
+
+def _iter_lines(text: str):
+    """
+    Yield the lines of `text` (as text.split("\n") would) one at a time. Reads the
+    original string in place, so no list of all lines or buffer copy is built.
+    """
+    start = 0
+    while True:
+        end = text.find("\n", start)
+        if end < 0:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
 
 def parse_transcript_with_timestamps(text: str) -> List[Dict]:
     """
@@ -23,28 +88,12 @@ def parse_transcript_with_timestamps(text: str) -> List[Dict]:
         return []
     
     segments = []
-    lines = text.split('\n')
     speakers_seen = {}  # Map speaker name to normalized label
     speaker_counter = 1
     last_speaker = None
     last_timestamp = 0.0
     
-    # Pattern 1: [HH:MM:SS] or [MM:SS] or [H:MM:SS] Speaker Name: text
-    pattern1 = re.compile(
-        r'\[?(\d{1,2}):(\d{2})(?::(\d{2}))?\]?\s*'  # timestamp [H]H:MM[:SS]
-        r'([A-Z][A-Za-z\.\-\s]{1,40}?)[:\-]\s*'      # speaker name followed by : or -
-        r'(.*)$',                                      # text
-        re.MULTILINE
-    )
-    
-    # Pattern 2: Speaker Name: text (no timestamp)
-    pattern2 = re.compile(
-        r'^([A-Z][A-Za-z\.\-\s]{1,40}?)[:\-]\s*'     # speaker name
-        r'(.*)$',                                      # text
-        re.MULTILINE
-    )
-    
-    for line in lines:
+    for line in _iter_lines(text):
         line = line.strip()
         if not line:
             continue
@@ -54,7 +103,7 @@ def parse_transcript_with_timestamps(text: str) -> List[Dict]:
         text_content = None
         
         # Try pattern 1 first (with timestamp)
-        match1 = pattern1.match(line)
+        match1 = _TIMESTAMPED_LINE.match(line)
         if match1:
             hours = int(match1.group(1))
             minutes = int(match1.group(2))
@@ -70,7 +119,7 @@ def parse_transcript_with_timestamps(text: str) -> List[Dict]:
             text_content = match1.group(5).strip()
         else:
             # Try pattern 2 (no timestamp)
-            match2 = pattern2.match(line)
+            match2 = _SPEAKER_LINE.match(line)
             if match2:
                 speaker_name = match2.group(1).strip()
                 text_content = match2.group(2).strip()
@@ -80,24 +129,25 @@ def parse_transcript_with_timestamps(text: str) -> List[Dict]:
         # If we found speaker and text, process it
         if speaker_name and text_content:
             # Normalize speaker name
-            speaker_name = re.sub(r'\s+', ' ', speaker_name).strip()
+            speaker_name = _WS.sub(' ', speaker_name).strip()
             
             # Skip if speaker name looks like a timestamp or is too generic
-            if re.match(r'^\d+$', speaker_name) or len(speaker_name) < 2:
+            if _DIGITS.match(speaker_name) or len(speaker_name) < 2:
                 continue
             
             # Map speaker to normalized label
             # Keep original speaker name if it looks like a real name, otherwise use Speaker N
+            # labels are interned: every segment of a speaker shares one string object
             if speaker_name not in speakers_seen:
                 # Check if it's already a generic "Speaker N" label
-                if re.match(r'^Speaker\s+\d+$', speaker_name, re.IGNORECASE):
-                    speakers_seen[speaker_name] = speaker_name  # Keep as is
+                if _GENERIC_SPEAKER.match(speaker_name):
+                    speakers_seen[speaker_name] = sys.intern(speaker_name)  # Keep as is
                 else:
                     # Use original name if it's a real name (not too long, has proper format)
-                    if len(speaker_name) <= 50 and re.match(r'^[A-Z][A-Za-z\.\-\s]+$', speaker_name):
-                        speakers_seen[speaker_name] = speaker_name  # Keep original name
+                    if len(speaker_name) <= 50 and _PROPER_NAME.match(speaker_name):
+                        speakers_seen[speaker_name] = sys.intern(speaker_name)  # Keep original name
                     else:
-                        speakers_seen[speaker_name] = f"Speaker {speaker_counter}"
+                        speakers_seen[speaker_name] = sys.intern(f"Speaker {speaker_counter}")
                         speaker_counter += 1
             
             normalized_speaker = speakers_seen[speaker_name]
@@ -119,19 +169,19 @@ def parse_transcript_with_timestamps(text: str) -> List[Dict]:
     # If no segments found with patterns, try to extract from plain text
     if not segments:
         # Look for any lines with "Name: text" pattern
-        for line in lines:
+        for line in _iter_lines(text):
             line = line.strip()
             if not line:
                 continue
             
             # Simple pattern: Name: text
-            colon_match = re.match(r'^([A-Z][A-Za-z\.\-\s]{2,40}?)[:\-]\s+(.+)$', line)
+            colon_match = _COLON_LINE.match(line)
             if colon_match:
                 speaker_name = colon_match.group(1).strip()
                 text_content = colon_match.group(2).strip()
                 
                 if speaker_name not in speakers_seen:
-                    speakers_seen[speaker_name] = f"Speaker {speaker_counter}"
+                    speakers_seen[speaker_name] = sys.intern(f"Speaker {speaker_counter}")
                     speaker_counter += 1
                 
                 segments.append({
@@ -151,15 +201,4 @@ def has_timestamp_format(text: str) -> bool:
     if not text:
         return False
     
-    # Check for common timestamp patterns
-    timestamp_patterns = [
-        r'\[\d{1,2}:\d{2}(?::\d{2})?\]',  # [HH:MM:SS] or [MM:SS]
-        r'^\d{1,2}:\d{2}(?::\d{2})?\s+',  # HH:MM:SS at start of line
-    ]
-    
-    for pattern in timestamp_patterns:
-        if re.search(pattern, text, re.MULTILINE):
-            return True
-    
-    return False
-
+    return any(pattern.search(text) for pattern in _TIMESTAMP_PATTERNS)
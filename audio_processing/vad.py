@@ -0,0 +1,90 @@
+"""
+Voice-activity based segmentation for long recordings.
+Splits audio into speech chunks that fit inside Whisper's 30 s input window so
+they can be decoded as one batch instead of sequentially shifting the window.
+"""
+import bisect
+from typing import List, Tuple
+
+SAMPLE_RATE = 16000
+_FRAME_MS = 30  # webrtcvad accepts 10/20/30 ms frames
+
+
+def load_audio(path, sr=SAMPLE_RATE):
+    """Decode an audio file to a mono float32 signal resampled to `sr`."""
+    import librosa
+    signal, _ = librosa.load(path, sr=sr, mono=True)
+    return signal
+
+
+def fixed_chunks(duration: float, max_chunk_s: float = 30.0) -> List[Tuple[float, float]]:
+    """Plain fixed-size windows, used when no VAD backend is installed."""
+    spans = []
+    start = 0.0
+    while start < duration:
+        end = min(duration, start + max_chunk_s)
+        spans.append((start, end))
+        start = end
+    return spans
+
+
+def vad_chunks(
+    signal,
+    sr: int = SAMPLE_RATE,
+    max_chunk_s: float = 30.0,
+    min_silence_s: float = 0.1,
+    aggressiveness: int = 2,
+) -> List[Tuple[float, float]]:
+    """
+    Return (start, end) spans in seconds covering the speech in `signal`.
+    Each span is at most `max_chunk_s` long and, where possible, ends inside a
+    pause of at least `min_silence_s`. Falls back to fixed windows if webrtcvad
+    is unavailable.
+    """
+    duration = len(signal) / float(sr) if sr else 0.0
+    if duration <= 0:
+        return []
+
+    try:
+        import numpy as np
+        import webrtcvad
+    except Exception:
+        return fixed_chunks(duration, max_chunk_s)
+
+    frame_len = int(sr * _FRAME_MS / 1000)
+    n_frames = len(signal) // frame_len
+    if n_frames == 0:
+        return [(0.0, duration)]
+
+    pcm = (np.clip(signal[: n_frames * frame_len], -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+    step = frame_len * 2  # int16 -> 2 bytes per sample
+    vad = webrtcvad.Vad(aggressiveness)
+    speech = [vad.is_speech(pcm[i * step:(i + 1) * step], sr) for i in range(n_frames)]
+
+    max_frames = max(1, int(max_chunk_s * 1000 / _FRAME_MS))
+    min_sil = max(1, int(round(min_silence_s * 1000 / _FRAME_MS)))
+
+    # frame indices where a pause of at least `min_sil` frames has been reached
+    cuts = []
+    run = 0
+    for i, is_speech in enumerate(speech):
+        run = 0 if is_speech else run + 1
+        if run >= min_sil:
+            cuts.append(i + 1)
+
+    def _next_speech(frm):
+        return next((i for i in range(frm, n_frames) if speech[i]), None)
+
+    spans = []
+    start = _next_speech(0)
+    while start is not None:
+        limit = start + max_frames
+        if limit >= n_frames:
+            end = n_frames
+        else:
+            j = bisect.bisect_right(cuts, limit) - 1
+            end = cuts[j] if j >= 0 and cuts[j] > start else limit
+        end_s = duration if end == n_frames else end * _FRAME_MS / 1000.0
+        spans.append((start * _FRAME_MS / 1000.0, end_s))
+        start = _next_speech(end)
+    return spans
@@ -23,6 +23,7 @@ import os
 class MeetingExporter:
     def __init__(self, header_image_path="college_header.jpg"):
         self.header_image_path = header_image_path
+        self._styles = None
 
     # ------------------------------------------------------
     # Helper: Clean general text
@@ -240,6 +241,16 @@ class MeetingExporter:
     # ------------------------------------------------------
     # PDF Export
     # ------------------------------------------------------
+    def _pdf_styles(self):
+        # built once per exporter; styles are only read while rendering
+        if self._styles is None:
+            styles = getSampleStyleSheet()
+            styles.add(ParagraphStyle(name="TitleStyle", fontSize=20, alignment=TA_CENTER))
+            styles.add(ParagraphStyle(name="Heading", fontSize=14, spaceAfter=10))
+            styles.add(ParagraphStyle(name="Body", fontSize=11, leading=14))
+            self._styles = styles
+        return self._styles
+
     def export_to_pdf(self, meeting_data):
         buffer = BytesIO()
 
@@ -252,10 +263,7 @@ class MeetingExporter:
             bottomMargin=20,
         )
 
-        styles = getSampleStyleSheet()
-        styles.add(ParagraphStyle(name="TitleStyle", fontSize=20, alignment=TA_CENTER))
-        styles.add(ParagraphStyle(name="Heading", fontSize=14, spaceAfter=10))
-        styles.add(ParagraphStyle(name="Body", fontSize=11, leading=14))
+        styles = self._pdf_styles()
 
         story = []
 
@@ -22,32 +22,33 @@ from nltk.tokenize import sent_tokenize
 from nltk.corpus import stopwords
 
 class MeetingNLPProcessor:
+    # constant tables shared by every instance; patterns are compiled once at import
+    filler_words = {
+        'um', 'uh', 'hmm', 'like', 'you know', 'i mean', 'sort of', 
+        'kind of', 'basically', 'actually', 'literally', 'so', 'well',
+        'okay', 'ok', 'right', 'yeah', 'yes', 'no', 'maybe'
+    }
+
+    decision_patterns = [re.compile(p, re.IGNORECASE) for p in (
+        r"(we|they|team|everyone|all)\s+(decided|agreed|approved|concluded|resolved|determined|will)",
+        r"(it was|has been)\s+(decided|agreed|approved|concluded|resolved)",
+        r"(decision|agreement|approval|resolution)\s+(was|is|has been)\s+(made|reached)",
+        r"(final|final decision|consensus)\s+(is|was|reached)",
+        r"(?:let'?s|let us)\s+(?:finalize|confirm|agree on)",
+        r"(?:agreed|approved|accepted|endorsed|ratified|confirmed)",
+        r"(?:decision|agreed)[:,\s]",
+    )]
+
+    action_patterns = [re.compile(p, re.IGNORECASE) for p in (
+        r"action:\s*([A-Z][a-z]+)\s*-\s*(.+?)\s*-\s*deadline:\s*([0-9]{1,2}/[0-9]{1,2}/[0-9]{4})",
+        r"(\w+)\s+(will|should|must|needs to|has to|is to|I'?ll)\s+(.+?)(?:by|before|on|until|deadline:)\s+([^\n.]+)",
+        r"(\w+)\s+(?:is responsible for|will handle|assigned to|tasked with)\s+(.+?)(?:by|before|on)?\s*([A-Z][a-z]+\s+\d+|[0-9]{1,2}/[0-9]{1,2}/[0-9]{4}|\d+\s+[A-Z][a-z]+)?",
+        r"(action item|task|to-do):\s*(.+?)(?:-|–)?\s*(?:assigned to|owner:)?\s*(\w+)(?:\s+by\s+([^.]+))?",
+    )]
+
     def __init__(self):
         self.nlp = None
         self._load_spacy()
-        
-        self.filler_words = {
-            'um', 'uh', 'hmm', 'like', 'you know', 'i mean', 'sort of', 
-            'kind of', 'basically', 'actually', 'literally', 'so', 'well',
-            'okay', 'ok', 'right', 'yeah', 'yes', 'no', 'maybe'
-        }
-        
-        self.decision_patterns = [
-            r"(we|they|team|everyone|all)\s+(decided|agreed|approved|concluded|resolved|determined|will)",
-            r"(it was|has been)\s+(decided|agreed|approved|concluded|resolved)",
-            r"(decision|agreement|approval|resolution)\s+(was|is|has been)\s+(made|reached)",
-            r"(final|final decision|consensus)\s+(is|was|reached)",
-            r"(?:let'?s|let us)\s+(?:finalize|confirm|agree on)",
-            r"(?:agreed|approved|accepted|endorsed|ratified|confirmed)",
-            r"(?:decision|agreed)[:,\s]",
-        ]
-        
-        self.action_patterns = [
-            r"action:\s*([A-Z][a-z]+)\s*-\s*(.+?)\s*-\s*deadline:\s*([0-9]{1,2}/[0-9]{1,2}/[0-9]{4})",
-            r"(\w+)\s+(will|should|must|needs to|has to|is to|I'?ll)\s+(.+?)(?:by|before|on|until|deadline:)\s+([^\n.]+)",
-            r"(\w+)\s+(?:is responsible for|will handle|assigned to|tasked with)\s+(.+?)(?:by|before|on)?\s*([A-Z][a-z]+\s+\d+|[0-9]{1,2}/[0-9]{1,2}/[0-9]{4}|\d+\s+[A-Z][a-z]+)?",
-            r"(action item|task|to-do):\s*(.+?)(?:-|–)?\s*(?:assigned to|owner:)?\s*(\w+)(?:\s+by\s+([^.]+))?",
-        ]
         self._stopword_cache = None
         
     def _load_spacy(self):
@@ -426,7 +427,7 @@ class MeetingNLPProcessor:
         
         for sentence in sentences:
             for pattern in self.decision_patterns:
-                if re.search(pattern, sentence, re.IGNORECASE):
+                if pattern.search(sentence):
                     cleaned = sentence.strip()
                     if cleaned and cleaned not in decisions:
                         decisions.append(cleaned)
@@ -457,7 +458,7 @@ class MeetingNLPProcessor:
                 continue
                 
             for pattern in self.action_patterns[1:]:
-                match = re.search(pattern, sentence, re.IGNORECASE)
+                match = pattern.search(sentence)
                 if match:
                     groups = match.groups()
                     
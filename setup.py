@@ -85,8 +85,14 @@ except Exception as e:
     # Optional packages
     print("\n📋 Optional packages:")
     optional_packages = [
+        ("faster_whisper", "faster-whisper"),
         ("whisper", "OpenAI Whisper"),
         ("whisperx", "WhisperX"),
+        ("webrtcvad", "WebRTC VAD"),
+        ("orjson", "orjson"),
+        ("ahocorasick", "pyahocorasick"),
+        ("pypdf", "pypdf"),
+        ("re2", "google-re2"),
         ("pyannote", "pyannote.audio"),
         ("sentence_transformers", "Sentence Transformers"),
     ]
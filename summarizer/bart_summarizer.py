@@ -1,14 +1,26 @@
+import copy
+import hashlib
+import importlib.util
+import logging
+import os
 import re
-from typing import List, Dict
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
 
-try:
-    from transformers import pipeline
-    HAVE_TRANSFORMERS = True
-except Exception:
-    HAVE_TRANSFORMERS = False
+logger = logging.getLogger(__name__)
+
+# transformers (and torch behind it) is imported on first model load, not at import
+HAVE_TRANSFORMERS = importlib.util.find_spec("transformers") is not None
 
 # Cache summarization pipelines per model to avoid reloading
 _PIPELINE_CACHE: Dict[str, object] = {}
+# Bounded LRU of generated summaries keyed by sha1(model, device, precision, text),
+# so reprocessing a transcript only pays for chunks that actually changed
+_SUMMARY_CACHE: "OrderedDict[str, str]" = OrderedDict()
+_SUMMARY_CACHE_SIZE = 512
+_SUMMARY_LOCK = threading.Lock()
 _INSTRUCTION_PHRASES = (
     "create a clear professional meeting summary",
     "format:",
@@ -16,29 +28,40 @@ _INSTRUCTION_PHRASES = (
     "speaker names or filler words",
 )
 
-def _calculate_max_length(text: str, summarizer) -> int:
-    """
-    Calculate appropriate max_length based on input text length.
-    For summarization, max_length should be ~50-60% of input length.
-    Returns a value between 50 and 500.
-    """
-    if not summarizer or not text:
-        return 200  # default fallback
-    
+def _count_tokens(text: str, summarizer) -> int:
+    """Token count of `text` under the pipeline's tokenizer (≈ len/4 without one)."""
+    if not text:
+        return 0
     try:
         # Try to get tokenizer from the pipeline
-        tokenizer = summarizer.tokenizer
+        tokenizer = summarizer.tokenizer if summarizer else None
         if tokenizer:
             # Tokenize the input to get actual token count
             tokens = tokenizer.encode(text, add_special_tokens=True, truncation=False, return_tensors=None)
-            input_length = len(tokens)
-        else:
-            # Fallback: estimate tokens from characters (rough approximation: 1 token ≈ 4 chars)
-            input_length = len(text) // 4
+            return len(tokens)
     except Exception:
-        # Fallback: estimate tokens from characters
-        input_length = len(text) // 4
-    
+        pass
+    # Fallback: estimate tokens from characters (rough approximation: 1 token ≈ 4 chars)
+    return len(text) // 4
+
+def _count_tokens_batch(texts: List[str], summarizer) -> List[int]:
+    """Token counts for many texts with one tokenizer call (batched in the fast tokenizer)."""
+    if not texts:
+        return []
+    try:
+        tokenizer = summarizer.tokenizer if summarizer else None
+        if tokenizer:
+            encoded = tokenizer(list(texts), add_special_tokens=True, truncation=False)
+            return [len(ids) for ids in encoded["input_ids"]]
+    except Exception:
+        pass
+    return [_count_tokens(t, summarizer) for t in texts]
+
+def _max_length_for_tokens(input_length: int) -> int:
+    """
+    For summarization, max_length should be ~50-60% of input length.
+    Returns a value between 80 and 600.
+    """
     # Calculate max_length as 60-75% of input for better summaries, but within reasonable bounds
     # For very short inputs, use at least 60% but minimum 80 tokens
     # For longer inputs, cap at 600 tokens to allow more comprehensive summaries
@@ -53,6 +76,14 @@ def _calculate_max_length(text: str, summarizer) -> int:
     
     return max(80, min(600, max_len))  # Ensure it's between 80 and 600
 
+def _calculate_max_length(text: str, summarizer) -> int:
+    """
+    Calculate appropriate max_length based on input text length.
+    """
+    if not summarizer or not text:
+        return 200  # default fallback
+    return _max_length_for_tokens(_count_tokens(text, summarizer))
+
 def _calculate_min_length(text: str, summarizer, max_length: int) -> int:
     """
     Calculate appropriate min_length based on max_length.
@@ -90,6 +121,35 @@ def _clean_transcript_for_global_summary(text: str) -> str:
     return cleaned.strip()
 
 
+def _summary_key(kind: str, model_name: str, text: str, device: int = -1, quantize: bool = False) -> str:
+    # the same text summarizes differently in fp32, fp16, 8-bit and int8, so the
+    # device and precision are part of the key
+    h = hashlib.sha1(f"{kind}\0{model_name}\0{device}\0{int(bool(quantize))}\0".encode("utf-8"))
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+
+def _cached_summary(key: str) -> Optional[str]:
+    with _SUMMARY_LOCK:
+        value = _SUMMARY_CACHE.get(key)
+        if value is not None:
+            _SUMMARY_CACHE.move_to_end(key)
+        return value
+
+
+def _store_summary(key: str, value: str) -> None:
+    with _SUMMARY_LOCK:
+        _SUMMARY_CACHE[key] = value
+        _SUMMARY_CACHE.move_to_end(key)
+        while len(_SUMMARY_CACHE) > _SUMMARY_CACHE_SIZE:
+            _SUMMARY_CACHE.popitem(last=False)
+
+
+def clear_summary_cache() -> None:
+    with _SUMMARY_LOCK:
+        _SUMMARY_CACHE.clear()
+
+
 def _looks_like_instruction(line: str) -> bool:
     lowered = line.lower()
     return any(phrase in lowered for phrase in _INSTRUCTION_PHRASES)
@@ -164,51 +224,273 @@ def _format_summary_output(summary_text: str) -> str:
         return "\n".join([intro] + bullets).strip()
     return intro
 
+def _quantize_int8(model):
+    """
+    Dynamic int8 quantization of the Linear layers (CPU only). Weights are stored
+    as int8 and matmuls run through fbgemm/qnnpack; returns the model unchanged
+    if no quantized engine is available.
+    """
+    try:
+        import torch
+        engines = torch.backends.quantized.supported_engines
+        if "fbgemm" in engines:
+            torch.backends.quantized.engine = "fbgemm"
+        elif "qnnpack" in engines:
+            torch.backends.quantized.engine = "qnnpack"
+        else:
+            return model
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    except Exception:
+        return model
+
+def _use_all_cores():
+    # intra-op parallelism for the CPU matmuls; torch defaults to physical cores only
+    try:
+        import torch
+        torch.set_num_threads(os.cpu_count() or 1)
+    except Exception:
+        pass
+
+def _default_batch_size(summarizer, device: int) -> int:
+    """4 on CPU, 8 on GPU."""
+    try:
+        on_gpu = summarizer.device.type != "cpu"
+    except Exception:
+        on_gpu = device is not None and device >= 0
+    return 8 if on_gpu else 4
+
+_DEVICE: Optional[int] = None
+
+def default_device() -> int:
+    """Pipeline device index: 0 when a CUDA GPU is visible, else -1 (CPU). Checked once."""
+    global _DEVICE
+    if _DEVICE is None:
+        try:
+            import torch
+            _DEVICE = 0 if torch.cuda.is_available() else -1
+        except Exception:
+            _DEVICE = -1
+    return _DEVICE
+
+def _load_8bit(model_name: str):
+    """8-bit (LLM.int8) weights via bitsandbytes on CUDA; None if unavailable."""
+    try:
+        import bitsandbytes  # noqa: F401
+        from transformers import AutoModelForSeq2SeqLM, BitsAndBytesConfig
+        return AutoModelForSeq2SeqLM.from_pretrained(
+            model_name,
+            quantization_config=BitsAndBytesConfig(load_in_8bit=True),
+            device_map="auto",
+        )
+    except Exception:
+        return None
+
+def load_bart_summarizer(
+    model_name: str = "sshleifer/distilbart-cnn-12-6",
+    device: int = -1,
+    quantize: bool = False,
+):
+    """
+    Build a summarization pipeline (uncached). Callers that manage their own
+    model lifetime (e.g. Streamlit's cache_resource) use this directly.
+    `quantize` applies int8 dynamic quantization when running on CPU; on a GPU it
+    loads 8-bit bitsandbytes weights when bitsandbytes is installed and float16
+    weights otherwise.
+    """
+    if not HAVE_TRANSFORMERS:
+        return None
+    try:
+        from transformers import AutoTokenizer, pipeline
+    except Exception:
+        return None
+    # Rust-backed fast tokenizer; shared by every chunk and the global pass via
+    # summarizer.tokenizer
+    tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+    model_8bit = _load_8bit(model_name) if quantize and device >= 0 else None
+    if model_8bit is not None:
+        # already placed by device_map; the pipeline must not move it again
+        summarizer = pipeline("summarization", model=model_8bit, tokenizer=tokenizer)
+    else:
+        kwargs = {}
+        if quantize and device >= 0:
+            import torch
+            kwargs["torch_dtype"] = torch.float16
+        summarizer = pipeline("summarization", model=model_name, tokenizer=tokenizer, device=device, **kwargs)
+    # keep decoder key/value states between generated tokens
+    summarizer.model.config.use_cache = True
+    if device == -1:
+        _use_all_cores()
+        if quantize:
+            summarizer.model = _quantize_int8(summarizer.model)
+    return summarizer
+
 def get_bart_summarizer(model_name: str = "sshleifer/distilbart-cnn-12-6", device: int = -1):
     if not HAVE_TRANSFORMERS:
         return None
     key = f"{model_name}:{device}"
     if key not in _PIPELINE_CACHE:
-        _PIPELINE_CACHE[key] = pipeline("summarization", model=model_name, device=device)
+        _PIPELINE_CACHE[key] = load_bart_summarizer(model_name=model_name, device=device)
     return _PIPELINE_CACHE[key]
 
-def summarize_chunks_bart(chunks: List[Dict], model_name: str = "sshleifer/distilbart-cnn-12-6", device: int = -1) -> List[Dict]:
-    summaries: List[Dict] = []
-    summarizer = get_bart_summarizer(model_name=model_name, device=device)
+def _fallback_summary(text: str) -> str:
+    # Fallback: return first 3 sentences
+    s = text.replace("\n", " ").strip()
+    parts = [p.strip() for p in s.split(".") if p.strip()]
+    return ". ".join(parts[:3]) + ("." if parts[:3] else "")
+
+def _item(chunk: Dict, summary_text: str) -> Dict:
+    return {
+        "start": chunk.get("start", 0),
+        "end": chunk.get("end", 0),
+        "summary": summary_text,
+    }
+
+def _cuda_staging(summarizer):
+    """
+    (tokenizer thread, H2D copy stream, tokenizer copy) when the pipeline's model
+    is on CUDA, else (None, None, None). The helper thread gets its own tokenizer:
+    a fast tokenizer used from two threads at once can fail with "Already borrowed".
+    """
+    try:
+        import torch
+        if summarizer.model.device.type != "cuda":
+            return None, None, None
+        tokenizer = copy.deepcopy(summarizer.tokenizer)
+        return (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="bart-tokenize"),
+            torch.cuda.Stream(),
+            tokenizer,
+        )
+    except Exception:
+        return None, None, None
+
+def _pin_batch(tokenizer, texts: List[str]) -> Dict:
+    # padded to the longest text in the batch, truncated to the model's context
+    enc = tokenizer(texts, padding="longest", truncation=True, return_tensors="pt")
+    return {k: v.pin_memory() for k, v in enc.items()}
 
-    for c in chunks:
-        text = c.get("text", "")
-        if summarizer:
+def _generate_cuda(summarizer, pinned: Dict, copy_stream, **gen_kwargs) -> List[Dict]:
+    """
+    model.generate on one pinned batch. The host-to-device copy is issued on
+    `copy_stream` so it doesn't queue behind kernels from the previous batch.
+    Returns pipeline-shaped [{'summary_text': ...}].
+    """
+    import torch
+    model = summarizer.model
+    with torch.cuda.stream(copy_stream):
+        inputs = {k: v.to(model.device, non_blocking=True) for k, v in pinned.items()}
+    compute = torch.cuda.current_stream()
+    compute.wait_stream(copy_stream)
+    for v in inputs.values():
+        v.record_stream(compute)
+    with torch.inference_mode():
+        ids = model.generate(**inputs, **gen_kwargs)
+    texts = summarizer.tokenizer.batch_decode(ids, skip_special_tokens=True, clean_up_tokenization_spaces=True)
+    return [{"summary_text": t.strip()} for t in texts]
+
+def summarize_chunks_bart(
+    chunks: List[Dict],
+    model_name: str = "sshleifer/distilbart-cnn-12-6",
+    device: int = -1,
+    summarizer=None,
+    on_summary=None,
+    batch_size: Optional[int] = None,
+    quantize: bool = False,
+) -> List[Dict]:
+    """
+    Summarize chunks in batches of `batch_size` (default: 4 on CPU, 8 on GPU). Chunks are sorted by token length
+    before batching to keep padding small, and results are returned in input order.
+    `on_summary`, if given, is called with every chunk summary as soon as it is
+    produced so callers can stream partial results.
+    `quantize` must match how `summarizer` was loaded; it keys the summary cache.
+    """
+    summarizer = summarizer or get_bart_summarizer(model_name=model_name, device=device)
+    texts = [c.get("text", "") for c in chunks]
+    results: List[Optional[str]] = [None] * len(chunks)
+
+    def _emit(i: int, summary_text: str):
+        results[i] = summary_text
+        if on_summary:
+            on_summary(_item(chunks[i], summary_text))
+
+    if not summarizer:
+        for i, text in enumerate(texts):
+            _emit(i, _fallback_summary(text))
+        return [_item(c, r) for c, r in zip(chunks, results)]
+
+    keys = [_summary_key("chunk", model_name, t, device, quantize) for t in texts]
+
+    def _emit_batch(batch, out):
+        for n, i in enumerate(batch):
+            res = out[n] if n < len(out) else None
+            if isinstance(res, list):
+                res = res[0] if res else None
+            if isinstance(res, dict) and "summary_text" in res:
+                summary_text = res["summary_text"]
+                _store_summary(keys[i], summary_text)
+            else:
+                summary_text = texts[i][:600]
+            for j in copies[keys[i]]:
+                _emit(j, summary_text)
+
+    # identical chunks (repeated boilerplate, looping speakers) are generated once;
+    # `copies` maps each key to every index that shares it
+    pending = []
+    copies: Dict[str, List[int]] = {}
+    for i, key in enumerate(keys):
+        cached = _cached_summary(key)
+        if cached is not None:
+            _emit(i, cached)
+        elif key in copies:
+            copies[key].append(i)
+        else:
+            copies[key] = [i]
+            pending.append(i)
+
+    counts = dict(zip(pending, _count_tokens_batch([texts[i] for i in pending], summarizer)))
+    pending.sort(key=counts.__getitem__)
+    if batch_size is None:
+        batch_size = _default_batch_size(summarizer, device)
+    batch_size = max(1, batch_size)
+    batches = [pending[b:b + batch_size] for b in range(0, len(pending), batch_size)]
+
+    # on CUDA the next batch is tokenized into pinned memory on a helper thread
+    # while the current one generates
+    prep, copy_stream, prep_tokenizer = _cuda_staging(summarizer) if batches else (None, None, None)
+    staged = prep.submit(_pin_batch, prep_tokenizer, [texts[i] for i in batches[0]]) if prep else None
+    try:
+        for k, batch in enumerate(batches):
+            current = staged
+            if prep and k + 1 < len(batches):
+                staged = prep.submit(_pin_batch, prep_tokenizer, [texts[i] for i in batches[k + 1]])
+            # one length budget per batch; neighbours have similar token counts after sorting
+            max_len = max(_max_length_for_tokens(counts[i]) for i in batch)
+            min_len = min(_calculate_min_length(texts[i], summarizer, _max_length_for_tokens(counts[i])) for i in batch)
+            gen_kwargs = dict(
+                max_length=max_len,
+                min_length=min_len,
+                do_sample=False,
+                num_beams=4,
+                early_stopping=True,
+                use_cache=True,
+            )
             try:
-                max_len = _calculate_max_length(text, summarizer)
-                min_len = _calculate_min_length(text, summarizer, max_len)
-                out = summarizer(
-                    text,
-                    max_length=max_len,
-                    min_length=min_len,
-                    truncation=True,
-                    do_sample=False,
-                    num_beams=4,
-                )
-                if isinstance(out, list) and out and "summary_text" in out[0]:
-                    summary_text = out[0]["summary_text"]
+                if prep:
+                    out = _generate_cuda(summarizer, current.result(), copy_stream, **gen_kwargs)
                 else:
-                    summary_text = text[:600]
+                    out = summarizer(
+                        [texts[i] for i in batch], batch_size=len(batch), truncation=True, **gen_kwargs
+                    )
             except Exception:
-                summary_text = text[:600]
-        else:
-            # Fallback: return first 3 sentences
-            s = text.replace("\n", " ").strip()
-            parts = [p.strip() for p in s.split(".") if p.strip()]
-            summary_text = ". ".join(parts[:3]) + ("." if parts[:3] else "")
-
-        summaries.append({
-            "start": c.get("start", 0),
-            "end": c.get("end", 0),
-            "summary": summary_text,
-        })
+                # the batch falls back to the raw chunk text; say why
+                logger.warning("Summarizing a batch of %d chunks failed", len(batch), exc_info=True)
+                out = []
+            _emit_batch(batch, out)
+    finally:
+        if prep:
+            prep.shutdown(wait=False)
 
-    return summaries
+    return [_item(c, r) for c, r in zip(chunks, results)]
 
 def merge_summaries_text(summaries: List[Dict]) -> str:
     return "\n\n".join([s.get("summary", "") for s in summaries if s.get("summary")])
@@ -284,7 +566,8 @@ def merge_bullet_summaries(primary: str, secondary: str, max_bullets: int = 15)
     _ingest(secondary)
     return "\n".join(bullet_lines)
 
-def summarize_global(text, model_name="sshleifer/distilbart-cnn-12-6", device=-1):
+def summarize_global(text, model_name="sshleifer/distilbart-cnn-12-6", device=-1, summarizer=None,
+                     quantize=False):
     if not text or len(text) < 40:
         return text or ""
 
@@ -292,15 +575,17 @@ def summarize_global(text, model_name="sshleifer/distilbart-cnn-12-6", device=-1
     cleaned = _clean_transcript_for_global_summary(text)
     cleaned = cleaned[:3500]  # shorten for model
 
-    prompt = (
-        "Create a clear professional meeting summary without speaker names or filler words.\n"
-        "Format:\n"
-        "1 paragraph (2-4 lines)\n"
-        "Then 4-8 bullet points of the main decisions / insights / next steps.\n\n"
-        "Transcript:\n" + cleaned
-    )
+    # BART is not instruction-tuned: a fixed preamble would only be re-encoded on
+    # every call (and sometimes echoed back), so the model sees the transcript alone.
+    # _format_summary_output shapes the paragraph + bullets afterwards.
+    prompt = cleaned
+
+    key = _summary_key("global", model_name, prompt, device, quantize)
+    cached = _cached_summary(key)
+    if cached is not None:
+        return cached
 
-    summarizer = get_bart_summarizer(model_name=model_name, device=device)
+    summarizer = summarizer or get_bart_summarizer(model_name=model_name, device=device)
     if summarizer:
         try:
             out = summarizer(
@@ -310,11 +595,111 @@ def summarize_global(text, model_name="sshleifer/distilbart-cnn-12-6", device=-1
                 truncation=True,
                 do_sample=False,
                 num_beams=4,
+                early_stopping=True,
+                use_cache=True,
             )
             if isinstance(out, list) and out and "summary_text" in out[0]:
-                return _format_summary_output(out[0]["summary_text"].strip())
+                result = _format_summary_output(out[0]["summary_text"].strip())
+                _store_summary(key, result)
+                return result
         except Exception:
             pass
 
     # fallback: trimmed cleaned text to keep UI populated, but still structured
     return _format_summary_output(cleaned[:600].strip())
+
+def _split_halves(text: str):
+    """Split on paragraph (then sentence) boundaries into two halves of similar size."""
+    parts = [p for p in text.split("\n\n") if p.strip()]
+    if len(parts) < 2:
+        parts = [p for p in re.split(r"(?<=[.!?])\s+", text) if p.strip()]
+    if len(parts) < 2:
+        mid = len(text) // 2
+        return text[:mid], text[mid:]
+    total = sum(len(p) for p in parts)
+    acc = 0
+    for cut, p in enumerate(parts, 1):
+        acc += len(p)
+        if acc >= total / 2:
+            break
+    cut = min(cut, len(parts) - 1)
+    return "\n\n".join(parts[:cut]), "\n\n".join(parts[cut:])
+
+def reduce_summaries(
+    text: str,
+    model_name: str = "sshleifer/distilbart-cnn-12-6",
+    device: int = -1,
+    summarizer=None,
+    short_threshold: int = 1200,
+    max_chars: int = 3500,
+    quantize: bool = False,
+) -> str:
+    """
+    Reduce merged chunk summaries to the final summary.
+      - shorter than `short_threshold`: formatted as-is, no model pass
+      - up to `max_chars`: one summarize_global pass
+      - longer: each half is reduced recursively, then the halves are summarized
+        together, so nothing past `max_chars` is truncated away
+    """
+    if not text or len(text) < short_threshold:
+        return _format_summary_output(_clean_transcript_for_global_summary(text or ""))
+    if len(text) <= max_chars:
+        return summarize_global(
+            text, model_name=model_name, device=device, summarizer=summarizer, quantize=quantize
+        )
+
+    left, right = _split_halves(text)
+    reduced = "\n\n".join(
+        r for r in (
+            reduce_summaries(part, model_name, device, summarizer, short_threshold, max_chars, quantize)
+            for part in (left, right)
+        ) if r
+    )
+    if len(reduced) >= len(text):
+        # no progress (e.g. model unavailable); let summarize_global truncate
+        reduced = text
+    return summarize_global(
+        reduced, model_name=model_name, device=device, summarizer=summarizer, quantize=quantize
+    )
+
+def summarize_hierarchical(
+    chunks: List[Dict],
+    model_name: str = "sshleifer/distilbart-cnn-12-6",
+    device: int = -1,
+    summarizer=None,
+    on_summary=None,
+    short_circuit_tokens: int = 900,
+    quantize: bool = False,
+):
+    """
+    Chunk pass + reduce pass on one shared pipeline. Returns (chunk_summaries,
+    global_summary). When the whole transcript fits in `short_circuit_tokens`,
+    the chunk pass is skipped and a single global pass runs over the joined text;
+    chunk_summaries is then empty. `quantize` is the precision `summarizer` was
+    loaded with, for the summary cache key.
+    """
+    summarizer = summarizer or get_bart_summarizer(model_name=model_name, device=device)
+    texts = [c.get("text", "") for c in chunks]
+    if summarizer and chunks and sum(_count_tokens_batch(texts, summarizer)) <= short_circuit_tokens:
+        global_summary = summarize_global(
+            "\n".join(texts), model_name=model_name, device=device, summarizer=summarizer,
+            quantize=quantize,
+        )
+        if on_summary:
+            on_summary({
+                "start": chunks[0].get("start", 0),
+                "end": chunks[-1].get("end", 0),
+                "summary": global_summary,
+            })
+        return [], global_summary
+
+    summaries = summarize_chunks_bart(
+        chunks, model_name=model_name, device=device, summarizer=summarizer, on_summary=on_summary,
+        quantize=quantize,
+    )
+    global_summary = reduce_summaries(
+        merge_summaries_text(summaries), model_name=model_name, device=device, summarizer=summarizer,
+        quantize=quantize,
+    )
+    return summaries, global_summary
+
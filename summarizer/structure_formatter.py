@@ -1,14 +1,11 @@
+import importlib.util
 import re
 from datetime import datetime
 from typing import Dict, List
 from pathlib import Path
 
-# try to import optional HF punctuation and summarization tools
-try:
-    from transformers import pipeline
-    HAVE_HF = True
-except Exception:
-    HAVE_HF = False
+# optional HF punctuation and summarization tools; imported only when used
+HAVE_HF = importlib.util.find_spec("transformers") is not None
 
 def extract_metadata_from_text(full_text):
     meta = {}
@@ -144,10 +141,11 @@ def extract_decisions_and_actions(full_text):
 
     return decisions[:15], actions[:15]
 
-def build_structure(diarized_segments, merged_summary, full_transcript_text):
-    from nlp_processor import MeetingNLPProcessor
-
-    processor = MeetingNLPProcessor()
+def build_structure(diarized_segments, merged_summary, full_transcript_text, processor=None):
+    # `processor` is a shared MeetingNLPProcessor; building one loads spaCy
+    if processor is None:
+        from nlp_processor import MeetingNLPProcessor
+        processor = MeetingNLPProcessor()
 
     metadata = extract_metadata_from_text(full_transcript_text)
     attendees = extract_attendees(diarized_segments)
@@ -195,6 +193,7 @@ def _punctuate_text(text: str):
     try:
         # choose a lightweight punctuation model if available
         model_name = "oliverguhr/fullstop-punctuation-multilingual"
+        from transformers import pipeline
         punct = pipeline("text2text-generation", model=model_name, device=-1)
         # run in chunks to avoid very long inputs
         max_chunk = 3000
@@ -239,6 +238,7 @@ def generate_structured_minutes(
     structured_text = ""
     if HAVE_HF:
         try:
+            from transformers import pipeline
             gen = pipeline("text2text-generation", model=model_name, device=device)
             # chunk prompt if too large; here we pass the full prompt (smaller models may truncate)
             out = gen(prompt, max_length=512, truncation=True)
@@ -1,42 +1,102 @@
-# try heavy imports, but allow graceful fallback
-try:
-    from transformers import pipeline
-    HAVE_TRANSFORMERS = True
-except Exception:
-    HAVE_TRANSFORMERS = False
+import importlib.util
+import math
+import re
+from typing import List, Dict, Optional
 
+# heavy optional packages are only checked for here and imported when first used
+HAVE_TRANSFORMERS = importlib.util.find_spec("transformers") is not None
 # sentence-transformers optional (not required for the fallback)
-try:
-    from sentence_transformers import SentenceTransformer, util
-    HAVE_ST = True
-except Exception:
-    HAVE_ST = False
+HAVE_ST = importlib.util.find_spec("sentence_transformers") is not None
 
-import math
-from typing import List, Dict
+# tokens left free under the encoder limit for special tokens / joining newlines
+_TOKEN_RESERVE = 124
+
+def _token_lengths(texts: List[str], tokenizer) -> List[int]:
+    if not texts:
+        return []
+    enc = tokenizer(texts, add_special_tokens=False, return_length=True)
+    lengths = enc.get("length") if hasattr(enc, "get") else None
+    if lengths is None:
+        lengths = [len(ids) for ids in enc["input_ids"]]
+    return [int(n) for n in lengths]
+
+def token_budget(tokenizer, reserve: int = _TOKEN_RESERVE, fallback: int = 1024) -> int:
+    """Per-chunk token budget from the tokenizer's own context size (1024 -> 900 for BART)."""
+    limit = getattr(tokenizer, "model_max_length", None)
+    # tokenizers without a configured limit report a huge sentinel value
+    if not isinstance(limit, int) or limit <= 0 or limit > 100_000:
+        limit = fallback
+    return max(1, limit - reserve)
+
+def _split_to_budget(text: str, tokenizer, max_tokens: int) -> List[str]:
+    """Split one oversized entry at sentence (then word) boundaries to fit max_tokens."""
+    pieces = [p for p in re.split(r"(?<=[.!?])\s+", text) if p.strip()]
+    if len(pieces) == 1:
+        pieces = text.split()
+    lengths = _token_lengths(pieces, tokenizer)
+    out, cur, cur_len = [], [], 0
+    for piece, n in zip(pieces, lengths):
+        if cur and cur_len + n > max_tokens:
+            out.append(" ".join(cur))
+            cur, cur_len = [], 0
+        cur.append(piece)
+        cur_len += n
+    if cur:
+        out.append(" ".join(cur))
+    return out
 
-def chunk_transcript(segments: List[Dict], max_chars: int = 3000) -> List[Dict]:
+def chunk_transcript(
+    segments: List[Dict],
+    max_chars: int = 3000,
+    max_tokens: Optional[int] = None,
+    tokenizer=None,
+) -> List[Dict]:
     """
-    Group segments into chunks ~max_chars by concatenating consecutive segments.
+    Group segments into chunks by concatenating consecutive segments.
+    With a `tokenizer`, chunks are sized by model tokens (at most `max_tokens`,
+    by default the tokenizer's context size minus some slack for special tokens);
+    otherwise by `max_chars` characters. Segment order is kept.
     Returns list of chunk dicts {'start','end','text','segments'}.
     """
-    chunks = []
-    cur = {"start": None, "end": None, "text": "", "segments": []}
+    entries = []
     for s in segments:
         text = s.get("text", "").strip()
         if not text:
             continue
+        speaker = s.get("speaker", "")
+        entries.append((s, f"{speaker}: {text}" if speaker else text))
+
+    if tokenizer is not None:
+        sizes = _token_lengths([e for _, e in entries], tokenizer)
+        budget = max_tokens or token_budget(tokenizer)
+        sized = []
+        for (s, entry), n in zip(entries, sizes):
+            if n > budget:
+                parts = _split_to_budget(entry, tokenizer, budget)
+                sized.extend(zip([s] * len(parts), parts, _token_lengths(parts, tokenizer)))
+            else:
+                sized.append((s, entry, n))
+    else:
+        budget = max_chars
+        sized = [(s, entry, len(entry)) for s, entry in entries]
+
+    chunks = []
+    cur = {"start": None, "end": None, "text": "", "segments": []}
+    cur_size = 0
+    for s, entry, size in sized:
         if cur["start"] is None:
             cur["start"] = s.get("start", 0)
         cur["end"] = s.get("end", s.get("start", 0))
-        speaker = s.get("speaker", "")
-        entry = f"{speaker}: {text}" if speaker else text
-        if cur["text"] and (len(cur["text"]) + len(entry) > max_chars):
+        if cur["text"] and (cur_size + size > budget):
             chunks.append(cur)
             cur = {"start": s.get("start", 0), "end": s.get("end", 0), "text": entry, "segments": [s]}
+            cur_size = size
         else:
             cur["text"] = (cur["text"] + "\n" + entry) if cur["text"] else entry
-            cur["segments"].append(s)
+            if not cur["segments"] or cur["segments"][-1] is not s:
+                cur["segments"].append(s)
+            # +1 for the joining newline
+            cur_size = (cur_size + 1 + size) if cur_size else size
     if cur["text"]:
         chunks.append(cur)
     return chunks
@@ -49,45 +109,69 @@ def _get_device():
     except Exception:
         return -1
 
-def summarize_chunks(chunks: List[Dict], model_name: str = "sshleifer/distilbart-cnn-12-6", device: int = None) -> List[Dict]:
+# one summarization pipeline per (model, device), reused across calls
+_PIPELINES: Dict[tuple, object] = {}
+
+def _get_pipeline(model_name: str, device: int):
+    key = (model_name, device)
+    if key not in _PIPELINES:
+        from transformers import pipeline
+        _PIPELINES[key] = pipeline("summarization", model=model_name, device=device)
+    return _PIPELINES[key]
+
+def _naive_summary(text: str) -> str:
+    # naive fallback: take first 3 sentences
+    s = text.replace("\n", " ").strip()
+    parts = [p.strip() for p in s.split(".") if p.strip()]
+    if parts:
+        return ". ".join(parts[:3]) + (". " if parts[:3] else "")
+    return s[:400]
+
+def summarize_chunks(chunks: List[Dict], model_name: str = "sshleifer/distilbart-cnn-12-6", device: int = None,
+                     batch_size: int = 8) -> List[Dict]:
     """
     Summarize each chunk. Default uses a smaller distilBART model for speed.
     Use transformers pipeline if available, otherwise a simple fallback.
+    Chunks are sorted by length and fed to the pipeline `batch_size` at a time,
+    so each generate() call pads to similar lengths; results keep input order.
     Returns list of summaries.
     """
-    summaries = []
     if device is None:
         device = _get_device()
 
     summarizer = None
     if HAVE_TRANSFORMERS:
         try:
-            summarizer = pipeline("summarization", model=model_name, device=device)
+            summarizer = _get_pipeline(model_name, device)
         except Exception:
             summarizer = None
 
-    for c in chunks:
-        text = c.get("text", "")
-        summary_text = None
+    texts = [c.get("text", "") for c in chunks]
+    summary_texts = [None] * len(chunks)
 
-        if summarizer:
+    if summarizer and texts:
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for b in range(0, len(order), batch_size):
+            idx = order[b:b + batch_size]
             try:
-                out = summarizer(text, max_length=160, min_length=30, truncation=True)
-                if isinstance(out, list) and len(out) > 0 and "summary_text" in out[0]:
-                    summary_text = out[0]["summary_text"]
+                out = summarizer(
+                    [texts[i] for i in idx],
+                    max_length=160, min_length=30, truncation=True, batch_size=len(idx),
+                )
             except Exception:
-                summary_text = None
-
-        if not summary_text:
-            # naive fallback: take first 3 sentences
-            s = text.replace("\n", " ").strip()
-            parts = [p.strip() for p in s.split(".") if p.strip()]
-            if parts:
-                summary_text = ". ".join(parts[:3]) + (". " if parts[:3] else "")
-            else:
-                summary_text = s[:400]
+                continue
+            for i, item in zip(idx, out):
+                if isinstance(item, list):
+                    item = item[0] if item else {}
+                summary_texts[i] = item.get("summary_text") if isinstance(item, dict) else None
 
-        summaries.append({"start": c.get("start", 0), "end": c.get("end", 0), "summary": summary_text})
+    summaries = []
+    for c, text, summary_text in zip(chunks, texts, summary_texts):
+        summaries.append({
+            "start": c.get("start", 0),
+            "end": c.get("end", 0),
+            "summary": summary_text or _naive_summary(text),
+        })
     return summaries
 
 def merge_summaries(summaries: List[Dict]) -> str: